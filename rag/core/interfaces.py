@@ -17,7 +17,7 @@ class VectorStore(Protocol):
     def search(self, queryVector: List[float], k: int, metaFilter: Optional[Dict[str, Any]] = None) -> List[Retrieved]: ...
 
 class Retriever(Protocol):
-    async def retrieve(self, query: str, k: int) -> List[Retrieved]: ...
+    async def retrieve(self, query: str, k: int, queryVector: Optional[List[float]] = None) -> List[Retrieved]: ...
 
 class Reranker(Protocol):
     def rerank(self, items: List[Retrieved]) -> List[Retrieved]: ...
@@ -1,7 +1,7 @@
 # core/types.py
 from __future__ import annotations
 from dataclasses import dataclass, replace
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 @dataclass(frozen=True)
 class Document:
@@ -38,6 +38,7 @@ class RagContext:
     prompt: str
     rawLlm: str
     parsed: Answer
+    queryVector: Optional[List[float]] = None  # Precomputed embedding of `question`
 
     def withExpanded(self, qs: List[str]) -> "RagContext":
         return replace(self, expandedQueries=list(qs))
@@ -47,7 +47,9 @@ class RetrieveStep:
                 # Use retrieveK from policy (how many to get from vector store)
                 k_value = ctx.k or self._policy.getRetrieveK()
                 logger.info(f"  Using k={k_value} for retrieval")
-                items = await self._retriever.retrieve(q, k_value)
+                # A client-supplied vector only describes the original question
+                qVec = ctx.queryVector if q == ctx.question else None
+                items = await self._retriever.retrieve(q, k_value, qVec)
                 logger.info(f"  Retrieved {len(items)} items for query: {q}")
                 if items:
                     logger.debug(f"  First item score: {items[0].score if items else 'N/A'}")
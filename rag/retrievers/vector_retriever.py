@@ -17,9 +17,13 @@ class VectorRetrieverImpl:
     def setMetaFilter(self, f: Optional[Dict[str, Any]]) -> None:
         self._metaFilter = f
 
-    async def retrieve(self, query: str, k: int) -> List[Retrieved]:
+    async def retrieve(self, query: str, k: int, queryVector: Optional[List[float]] = None) -> List[Retrieved]:
         logger.info(f"Retrieving for query: '{query[:50]}...' with k={k}")
-        qVec = self._embedder.embedTexts([query])[0]
+        if queryVector is not None:
+            # Caller already embedded the query; skip the embedder
+            qVec = queryVector
+        else:
+            qVec = self._embedder.embedTexts([query])[0]
         logger.debug(f"Query vector dimension: {len(qVec)}")
         
         results = self._store.search(qVec, k, self._metaFilter)
@@ -18,6 +18,7 @@ class AskRequest(BaseModel):
     provider: Optional[str] = Field(default=None)
     model: Optional[str] = Field(default=None)
     strict_mode: Optional[bool] = Field(default=False)
+    query_vector: Optional[List[float]] = Field(default=None)  # Precomputed question embedding
     
     class Config:
         protected_namespaces = ()  # Disable protected namespace check
@@ -79,6 +80,16 @@ async def ask_question(body: AskRequest) -> AskResponse:
         
         logger.debug(f"[ASK] Using k={k} for retrieval")
         
+        # A precomputed vector must come from the same embedder as the store
+        if body.query_vector is not None:
+            embedder = _container.resolve("embedder")
+            expected_dim = embedder.getDim()
+            if len(body.query_vector) != expected_dim:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"query_vector has {len(body.query_vector)} dimensions, embedder expects {expected_dim}"
+                )
+        
         # Create RAG context
         from rag.core.types import RagContext
         
@@ -91,7 +102,8 @@ async def ask_question(body: AskRequest) -> AskResponse:
             compressedCtx="",
             prompt="",
             rawLlm="",
-            parsed=None
+            parsed=None,
+            queryVector=body.query_vector
         )
         
         # Handle provider/model override if specified
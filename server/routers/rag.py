@@ -70,6 +70,14 @@ async def get_rag_stats() -> dict:
             "status": "ok"
         }
         
+        # Embedder in use, so clients can precompute matching query vectors
+        try:
+            embedder = _container.resolve("embedder")
+            result["embedding_model"] = getattr(embedder, "model_name", None)
+            result["embedding_dim"] = embedder.getDim()
+        except Exception as e:
+            logger.warning(f"[RAG API] Could not read embedder info: {e}")
+        
         # Add additional collection info if available
         if actual_collection != "unknown":
             result["collection_name"] = actual_collection
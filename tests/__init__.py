@@ -10,6 +10,7 @@ __all__ = [
     'test_chunker_api',
     'test_wrapper',
     'test_embedder_manager',
+    'test_chat_display',
     
     # Integration tests
     'test_client',
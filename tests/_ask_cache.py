@@ -0,0 +1,115 @@
+"""
+Local /ask response cache for the test scripts
+
+Exact matches are keyed by the normalized question; near-duplicates are found by
+cosine similarity of the caller's query_vector, which comes from the server's own
+embedder (see _fixtures.query_vectors). Without one only exact matches are used.
+Off by default, since a hit skips the server entirely; set ASK_CACHE=1 to use it
+when re-running scripts against an unchanged corpus.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ask_cache.sqlite3')
+CACHE_TTL = 3600.0  # Entries older than this are ignored so re-ingestion shows up
+SIMILARITY_THRESHOLD = 0.92
+
+ENABLED = os.environ.get("ASK_CACHE", "0") != "0"
+
+_conn = None
+# Test scripts call ask_cached from worker threads; one connection is shared
+_lock = threading.Lock()
+
+class CachedResponse:
+    """Stand-in for an HTTP response on a cache hit"""
+    status_code = 200
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8')
+
+    def json(self):
+        return json.loads(self.content)
+
+def _connection():
+    """Shared connection; call with _lock held"""
+    global _conn
+    if _conn is None:
+        _conn = sqlite3.connect(CACHE_FILE, check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS ask_cache ("
+            " key TEXT PRIMARY KEY, k INTEGER, vec BLOB, body BLOB, created REAL)"
+        )
+    return _conn
+
+def _normalized(query_vector):
+    """Unit-length float32 copy of query_vector, or None"""
+    if not query_vector:
+        return None
+    vec = np.asarray(query_vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else None
+
+def _lookup(conn, key: str, k, vec):
+    cutoff = time.time() - CACHE_TTL
+    row = conn.execute(
+        "SELECT body FROM ask_cache WHERE key = ? AND created >= ?", (key, cutoff)
+    ).fetchone()
+    if row is not None:
+        return row[0]
+    if vec is None:
+        return None
+
+    # Only vectors of the same size; the server's embedder may have changed
+    rows = conn.execute(
+        "SELECT vec, body FROM ask_cache WHERE k IS ? AND length(vec) = ? AND created >= ?",
+        (k, vec.nbytes, cutoff)
+    ).fetchall()
+    if not rows:
+        return None
+
+    matrix = np.frombuffer(b''.join(r[0] for r in rows), dtype=np.float32).reshape(len(rows), -1)
+    scores = matrix @ vec
+    best = int(scores.argmax())
+    if scores[best] >= SIMILARITY_THRESHOLD:
+        return rows[best][1]
+    return None
+
+def ask_cached(session, url: str, question: str, k: int = None, timeout: float = 30,
+               query_vector: list = None):
+    """POST question to {url}/ask, answering repeats and near-duplicates locally"""
+    payload = {"question": question}
+    if k is not None:
+        payload["k"] = k
+    if query_vector is not None:
+        payload["query_vector"] = query_vector
+
+    if not ENABLED:
+        return session.post(f"{url}/ask", json=payload, timeout=timeout)
+
+    normalized = question.strip().lower()
+    key = hashlib.sha256(f"{k}:{normalized}".encode('utf-8')).hexdigest()
+    vec = _normalized(query_vector)
+
+    with _lock:
+        body = _lookup(_connection(), key, k, vec)
+    if body is not None:
+        return CachedResponse(body)
+
+    response = session.post(f"{url}/ask", json=payload, timeout=timeout)
+    if response.status_code == 200:
+        with _lock, _connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO ask_cache VALUES (?, ?, ?, ?, ?)",
+                (key, k, None if vec is None else vec.tobytes(), response.content, time.time())
+            )
+    return response
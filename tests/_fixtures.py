@@ -0,0 +1,115 @@
+"""
+Shared test corpus ingestion
+"""
+import hashlib
+import json
+import os
+
+import orjson
+
+from _http import BASE_URL, SESSION
+
+# Corpora already ingested, with the store state seen right after ingestion
+MARKER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.ingested_corpora.json')
+
+# Precomputed query embeddings, keyed by model then question
+EMBEDDINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.query_embeddings.json')
+
+# Overrides the embedder reported by the server; it must still match it
+QUERY_EMBEDDING_MODEL = os.environ.get("TEST_EMBEDDING_MODEL")
+
+def _load_markers() -> dict:
+    try:
+        with open(MARKER_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_markers(markers: dict):
+    with open(MARKER_FILE, 'w', encoding='utf-8') as f:
+        json.dump(markers, f, indent=2)
+
+def _store_state(session):
+    """Return (namespace, total_vectors) reported by /api/rag/stats"""
+    data = session.get(f"{BASE_URL}/api/rag/stats", timeout=5).json()
+    return data.get('namespace'), data.get('total_vectors', 0)
+
+def _server_embedder(session):
+    """Return (model, dim) of the server's embedder, or (None, None) if not reported"""
+    try:
+        data = session.get(f"{BASE_URL}/api/rag/stats", timeout=5).json()
+    except Exception:
+        return None, None
+    return data.get('embedding_model'), data.get('embedding_dim')
+
+def query_vectors(queries: list, session=SESSION) -> dict:
+    """
+    Return {question: embedding} for queries, computing missing ones once.
+    
+    Vectors are made with the embedder the server reports. Returns an empty
+    dict when that is unknown or sentence-transformers is not installed, in
+    which case the server embeds the questions itself.
+    """
+    model_name, dim = _server_embedder(session)
+    model_name = QUERY_EMBEDDING_MODEL or model_name
+    if not model_name:
+        return {}
+    
+    try:
+        with open(EMBEDDINGS_FILE, 'rb') as f:
+            cache = orjson.loads(f.read())
+    except (OSError, ValueError):
+        cache = {}
+    vectors = cache.setdefault(model_name, {})
+    
+    missing = [q for q in queries if q not in vectors]
+    if missing:
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            return {}
+        model = SentenceTransformer(model_name)
+        for q, vec in zip(missing, model.encode(missing, normalize_embeddings=True)):
+            vectors[q] = vec.tolist()
+        with open(EMBEDDINGS_FILE, 'wb') as f:
+            f.write(orjson.dumps(cache))
+    
+    result = {q: vectors[q] for q in queries}
+    if dim and any(len(v) != dim for v in result.values()):
+        # The server would reject these with 400
+        return {}
+    return result
+
+def stream_docs(docs: list):
+    """Yield an ingest payload piece by piece so it is sent with chunked encoding"""
+    yield b'{"documents":['
+    for i, doc in enumerate(docs):
+        if i:
+            yield b','
+        yield orjson.dumps(doc)
+    yield b']}'
+
+def ensure_corpus(session, docs: list):
+    """
+    POST docs to /ingest in a single batch unless the store already holds them.
+    
+    Returns the ingest response, or None when the batch was skipped.
+    """
+    signature = hashlib.sha256(orjson.dumps(docs, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    
+    markers = _load_markers()
+    marker = markers.get(signature)
+    if marker is not None:
+        namespace, total_vectors = _store_state(session)
+        # Same namespace and nothing dropped since then: the corpus is still there
+        if namespace == marker['namespace'] and total_vectors >= marker['total_vectors']:
+            return None
+    
+    response = session.post(f"{BASE_URL}/ingest", content=stream_docs(docs), timeout=60)
+    
+    if response.status_code == 200:
+        namespace, total_vectors = _store_state(session)
+        markers[signature] = {'namespace': namespace, 'total_vectors': total_vectors}
+        _save_markers(markers)
+    
+    return response
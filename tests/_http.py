@@ -0,0 +1,85 @@
+"""
+Shared HTTP helpers for the test scripts
+"""
+import socket
+import time
+from functools import partial
+
+import httpx
+
+BASE_URL = "http://localhost:7001"
+
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_TOTAL = 2
+RETRY_BACKOFF = 0.2
+
+class RetryTransport(httpx.HTTPTransport):
+    """Retry gateway errors with exponential backoff
+
+    httpx's own `retries` only covers failed connects. Streamed request
+    bodies (e.g. chunked ingest uploads) cannot be replayed and go out once.
+    """
+
+    def handle_request(self, request):
+        response = super().handle_request(request)
+        if not isinstance(request.stream, httpx.ByteStream):
+            return response
+        for attempt in range(RETRY_TOTAL):
+            if response.status_code not in RETRY_STATUSES:
+                break
+            response.close()
+            time.sleep(RETRY_BACKOFF * (2 ** attempt))
+            response = super().handle_request(request)
+        return response
+
+# One pooled client for every script instead of a fresh connection per call.
+# httpx.Client is thread-safe and keeps the requests-style get/post/json API;
+# HTTP/2 is used whenever the server negotiates it.
+SESSION = httpx.Client(
+    base_url=BASE_URL,
+    timeout=30.0,
+    # Pool size and HTTP/2 live on the transport once one is passed explicitly
+    transport=RetryTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    ),
+    headers={"Content-Type": "application/json"}
+)
+
+# Pre-bound call shapes; per-call kwargs still override the defaults
+get_json = partial(SESSION.get, timeout=10.0)
+post_json = partial(SESSION.post, timeout=30.0)
+
+_health_cache = {}
+_warmed = False
+
+def server_up(host: str = "localhost", port: int = 7001, timeout: float = 0.5) -> bool:
+    """Cheap TCP probe so a stopped server fails in milliseconds, not a full HTTP timeout"""
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+def health(ttl: float = 2.0):
+    """GET /health, reusing the last response for `ttl` seconds"""
+    now = time.monotonic()
+    if now - _health_cache.get('t', float('-inf')) < ttl:
+        return _health_cache['response']
+    
+    response = SESSION.get(f"{BASE_URL}/health", timeout=1)
+    _health_cache.update(t=now, response=response)
+    return response
+
+def warmup():
+    """Fire one throwaway /ask so the embedder, reranker and LLM are loaded
+    before anything is timed. Runs at most once per process."""
+    global _warmed
+    if _warmed:
+        return
+    _warmed = True
+    try:
+        post_json(f"{BASE_URL}/ask", json={"question": "warm"}, timeout=60)
+    except httpx.HTTPError:
+        pass
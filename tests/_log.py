@@ -0,0 +1,30 @@
+"""
+Buffered console output for the test scripts
+"""
+import io
+import sys
+
+def banner(title: str, width: int = 60) -> str:
+    """The `====` / title / `====` header as one string"""
+    rule = "=" * width
+    return f"{rule}\n{title}\n{rule}"
+
+class Section:
+    """Collect a section's lines and write them to stdout in one go
+
+        with Section() as log:
+            log("first line")
+            log("value:", 42)
+    """
+
+    def __enter__(self):
+        self.buf = io.StringIO()
+        return self.log
+
+    def log(self, *args, **kwargs):
+        print(*args, file=self.buf, **kwargs)
+
+    def __exit__(self, *exc):
+        sys.stdout.write(self.buf.getvalue())
+        sys.stdout.flush()
+        return False
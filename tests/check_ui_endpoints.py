@@ -5,29 +5,56 @@ Checks all UI files for correct API endpoint usage
 """
 import os
 import re
-from pathlib import Path
+from collections import namedtuple
+
+# One recorded hit; `endpoints` is the (old, new) pair, formatted only when printed
+Issue = namedtuple('Issue', 'file name line endpoints content')
+
+# Directory names that are never scanned
+SKIP_DIRS = frozenset({'backup', 'old_files', 'tests', '__pycache__', '.git'})
+
+# Define correct endpoints (all with /api prefix)
+CORRECT_ENDPOINTS = {
+    '/api/ask': 'Question answering',
+    '/api/ingest': 'Document ingestion',
+    '/api/config/reload': 'Configuration reload',
+    '/api/rag/stats': 'RAG statistics',
+    '/api/chunkers/strategy': 'Chunker strategy',
+    '/api/namespaces': 'Namespace management',
+    '/api/switch_namespace': 'Switch namespace',
+}
+
+# Define old endpoints that should be updated
+OLD_ENDPOINTS = {
+    '/ask': '/api/ask',
+    '/ingest': '/api/ingest',
+    '/config/reload': '/api/config/reload',
+}
+
+# Byte forms of the old endpoints, used to screen whole files cheaply
+OLD_TOKENS = tuple(ep.encode() for ep in OLD_ENDPOINTS)
+
+# (double-quoted, single-quoted, api-prefixed, old, new) per old endpoint
+OLD_LITERALS = tuple(
+    (f'"{old_ep}"', f"'{old_ep}'", '/api' + old_ep, old_ep, new_ep)
+    for old_ep, new_ep in OLD_ENDPOINTS.items()
+)
+
+# Start of an f-string that opens with an interpolation
+F_STRING_PROBE = re.compile(r'f["\']\{')
+
+def iter_py_files(directory):
+    """Yield (path, name) for every .py file below directory, pruning SKIP_DIRS"""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_dir(follow_symlinks=False):
+                if entry.name not in SKIP_DIRS:
+                    yield from iter_py_files(entry.path)
+            elif entry.name.endswith('.py'):
+                yield entry.path, entry.name
 
 def check_ui_endpoints():
     """Check all UI files for API endpoint consistency"""
-    
-    # Define correct endpoints (all with /api prefix)
-    correct_endpoints = {
-        '/api/ask': 'Question answering',
-        '/api/ingest': 'Document ingestion',
-        '/api/config/reload': 'Configuration reload',
-        '/api/rag/stats': 'RAG statistics',
-        '/api/chunkers/strategy': 'Chunker strategy',
-        '/api/namespaces': 'Namespace management',
-        '/api/switch_namespace': 'Switch namespace',
-    }
-    
-    # Define old endpoints that should be updated
-    old_endpoints = {
-        '/ask': '/api/ask',
-        '/ingest': '/api/ingest',
-        '/config/reload': '/api/config/reload',
-    }
-    
     issues = []
     
     # UI directories to check
@@ -37,56 +64,36 @@ def check_ui_endpoints():
     ]
     
     for base_dir in ui_dirs:
-        for root, dirs, files in os.walk(base_dir):
-            # Skip backup files and non-UI directories
-            if 'backup' in root or 'old_files' in root or 'tests' in root:
-                continue
+        for filepath, filename in iter_py_files(base_dir):
+            # Read file content
+            try:
+                with open(filepath, 'rb') as f:
+                    raw = f.read()
+                
+                # Most files mention none of the old endpoints; skip the per-line scan
+                if not any(token in raw for token in OLD_TOKENS):
+                    continue
                 
-            for file in files:
-                if file.endswith('.py') and not file.endswith('.backup'):
-                    filepath = os.path.join(root, file)
+                lines = raw.decode('utf-8').split('\n')
                     
-                    # Read file content
-                    try:
-                        with open(filepath, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-                            
+                # Check for old endpoints
+                for line_num, line in enumerate(lines, 1):
+                    # Check for requests calls
+                    if 'requests.' in line:
                         # Check for old endpoints
-                        for line_num, line in enumerate(lines, 1):
-                            # Check for requests calls
-                            if 'requests.' in line:
-                                # Check for old endpoints
-                                for old_ep, new_ep in old_endpoints.items():
-                                    if f'"{old_ep}"' in line or f"'{old_ep}'" in line:
-                                        issues.append({
-                                            'file': filepath,
-                                            'line': line_num,
-                                            'issue': f'Old endpoint {old_ep} should be {new_ep}',
-                                            'content': line.strip()
-                                        })
+                        for double_q, single_q, _, old_ep, new_ep in OLD_LITERALS:
+                            if double_q in line or single_q in line:
+                                issues.append(Issue(filepath, filename, line_num, (old_ep, new_ep), line))
+                    
+                    # Check for f-strings with endpoints
+                    if 'baseUrl' in line and F_STRING_PROBE.search(line):
+                        for _, _, api_ep, old_ep, new_ep in OLD_LITERALS:
+                            # Check if it's not already using /api
+                            if old_ep in line and api_ep not in line:
+                                issues.append(Issue(filepath, filename, line_num, (old_ep, new_ep), line))
                                 
-                                # Check if using correct endpoints
-                                for endpoint in correct_endpoints:
-                                    if endpoint in line:
-                                        # This is good, using correct endpoint
-                                        pass
-                            
-                            # Check for f-strings with endpoints
-                            if 'f"{' in line or "f'{" in line:
-                                for old_ep, new_ep in old_endpoints.items():
-                                    if old_ep in line and 'baseUrl' in line:
-                                        # Check if it's not already using /api
-                                        if '/api' + old_ep not in line:
-                                            issues.append({
-                                                'file': filepath,
-                                                'line': line_num,
-                                                'issue': f'Old endpoint {old_ep} should be {new_ep}',
-                                                'content': line.strip()
-                                            })
-                                            
-                    except Exception as e:
-                        print(f"Error reading {filepath}: {e}")
+            except Exception as e:
+                print(f"Error reading {filepath}: {e}")
     
     return issues
 
@@ -105,18 +112,19 @@ def main():
         # Group by file
         files_with_issues = {}
         for issue in issues:
-            file = issue['file']
+            file = issue.file
             if file not in files_with_issues:
                 files_with_issues[file] = []
             files_with_issues[file].append(issue)
         
         # Display issues
         for file, file_issues in files_with_issues.items():
-            print(f"\n📁 {Path(file).name}")
+            print(f"\n📁 {file_issues[0].name}")
             print(f"   Path: {file}")
             for issue in file_issues:
-                print(f"   Line {issue['line']}: {issue['issue']}")
-                print(f"   >>> {issue['content']}")
+                old_ep, new_ep = issue.endpoints
+                print(f"   Line {issue.line}: Old endpoint {old_ep} should be {new_ep}")
+                print(f"   >>> {issue.content.strip()}")
     
     print("\n" + "="*60)
     print("Verification complete!")
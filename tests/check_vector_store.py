@@ -3,10 +3,10 @@
 Check vector store persistence and functionality
 """
 
-import requests
 import json
 import time
 import sys
+from _http import health, post_json, server_up
 
 def check_vector_store():
     base_url = "http://localhost:7001"
@@ -17,8 +17,11 @@ def check_vector_store():
     
     # 1. Check current store status
     print("\n1. Checking server health...")
+    if not server_up():
+        print("❌ Cannot connect to server")
+        return
     try:
-        response = requests.get(f"{base_url}/health")
+        response = health()
         if response.status_code != 200:
             print("❌ Server not running. Start with: python start_server.py")
             return
@@ -36,10 +39,9 @@ def check_vector_store():
         "text": "This is a test document for checking vector store persistence. If you can retrieve this after server restart, persistence is working."
     }
     
-    response = requests.post(
+    response = post_json(
         f"{base_url}/ingest",
-        json={"documents": [test_doc]},
-        headers={"Content-Type": "application/json"}
+        json={"documents": [test_doc]}
     )
     
     if response.status_code == 200:
@@ -51,10 +53,9 @@ def check_vector_store():
     
     # 3. Test immediate retrieval
     print("\n3. Testing immediate retrieval...")
-    response = requests.post(
+    response = post_json(
         f"{base_url}/ask",
-        json={"question": "persistence test document"},
-        headers={"Content-Type": "application/json"}
+        json={"question": "persistence test document"}
     )
     
     if response.status_code == 200:
@@ -86,10 +87,9 @@ def check_after_restart():
     
     # Check if test document is still there
     print("\n1. Checking if test document persisted...")
-    response = requests.post(
+    response = post_json(
         f"{base_url}/ask",
-        json={"question": "persistence test document"},
-        headers={"Content-Type": "application/json"}
+        json={"question": "persistence test document"}
     )
     
     if response.status_code == 200:
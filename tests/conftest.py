@@ -0,0 +1,12 @@
+# tests/conftest.py
+"""
+pytest setup for the test scripts
+
+The scripts import their helpers as top-level modules (`from _http import ...`),
+which works when they are run directly. tests/ is a package, so under pytest
+the directory is put on sys.path here to keep those imports working.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
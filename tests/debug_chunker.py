@@ -4,8 +4,35 @@ Debug script for chunker registry
 """
 import sys
 import os
+import traceback
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'rag'))
 
+# Signatures of the current run of identical failures, kept across runs so a
+# probe loop hitting the same error every second prints its traceback once
+FAILURES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.debug_chunker_failures')
+MAX_FAILURE_SIGNATURES = 16
+
+def _seen_failures() -> list:
+    try:
+        with open(FAILURES_FILE, 'r', encoding='utf-8') as f:
+            return f.read().splitlines()
+    except OSError:
+        return []
+
+def report_failure(e: Exception):
+    """Print a one-line digest, and the full traceback only the first time it is seen"""
+    signature = f"{type(e).__name__}: {e}".replace('\n', ' ')
+    print(f"\nERROR: {e}")
+    seen = _seen_failures()
+    if signature in seen:
+        print("(traceback already shown by an earlier run)")
+        return
+    
+    with open(FAILURES_FILE, 'w', encoding='utf-8') as f:
+        f.write('\n'.join((seen + [signature])[-MAX_FAILURE_SIGNATURES:]))
+    print("\nFull traceback:")
+    sys.stderr.write(''.join(traceback.TracebackException.from_exception(e).format()))
+
 print("Testing Chunker Registry...")
 print("=" * 60)
 
@@ -34,10 +61,9 @@ try:
     
     # Test API
     print("4. Testing via API...")
-    import requests
-    base_url = "http://localhost:7001"
+    from _http import BASE_URL, SESSION
     
-    response = requests.get(f"{base_url}/api/chunkers/strategies", timeout=5)
+    response = SESSION.get(f"{BASE_URL}/api/chunkers/strategies", timeout=5)
     if response.status_code == 200:
         data = response.json()
         print(f"   API Response OK: {len(data.get('strategies', []))} strategies")
@@ -47,9 +73,9 @@ try:
     
     print("\n" + "=" * 60)
     print("Test completed successfully!")
+    # A later failure starts a new streak and shows its traceback again
+    if os.path.exists(FAILURES_FILE):
+        os.remove(FAILURES_FILE)
     
 except Exception as e:
-    import traceback
-    print(f"\nERROR: {e}")
-    print("\nFull traceback:")
-    traceback.print_exc()
+    report_failure(e)
@@ -2,8 +2,9 @@
 """
 Debug RAG router registration
 """
-import requests
-import json
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from _http import SESSION
 
 def debug_routes():
     """Check what routes are actually available"""
@@ -16,9 +17,9 @@ def debug_routes():
     # Try to get OpenAPI spec
     print("\n1. Getting OpenAPI spec...")
     try:
-        r = requests.get(f"{base_url}/openapi.json", timeout=3)
+        r = SESSION.get(f"{base_url}/openapi.json", timeout=3)
         if r.status_code == 200:
-            spec = r.json()
+            spec = orjson.loads(r.content)
             paths = spec.get('paths', {})
             print(f"   ✓ Found {len(paths)} paths:")
             for path in sorted(paths.keys()):
@@ -40,25 +41,37 @@ def debug_routes():
         ("/api/health/detailed", "GET"),
     ]
     
-    for path, method in endpoints:
-        print(f"\n   Testing {method} {path}...")
+    # Build every request once; the loop below only dispatches
+    prepared = [
+        (path, method, SESSION.build_request(method, f"{base_url}{path}", timeout=3))
+        for path, method in endpoints
+    ]
+    
+    def probe(req):
         try:
-            if method == "GET":
-                r = requests.get(f"{base_url}{path}", timeout=3)
-            else:
-                r = requests.request(method, f"{base_url}{path}", timeout=3)
-            
-            print(f"     Status: {r.status_code}")
-            if r.status_code == 200:
-                print(f"     ✓ Success")
-                # Show first 100 chars of response
-                text = r.text[:100] + "..." if len(r.text) > 100 else r.text
-                print(f"     Response: {text}")
-            else:
-                print(f"     ✗ Failed")
-                print(f"     Response: {r.text[:200]}")
+            return SESSION.send(req), None
         except Exception as e:
-            print(f"     ✗ Error: {e}")
+            return None, e
+    
+    # Probes are pure network waits, so overlap them and print in order afterwards
+    with ThreadPoolExecutor(max_workers=len(prepared)) as executor:
+        results = list(executor.map(probe, [req for _, _, req in prepared]))
+    
+    for (path, method, _), (r, error) in zip(prepared, results):
+        print(f"\n   Testing {method} {path}...")
+        if error is not None:
+            print(f"     ✗ Error: {error}")
+            continue
+        
+        print(f"     Status: {r.status_code}")
+        if r.status_code == 200:
+            print(f"     ✓ Success")
+            # Show first 100 chars of response
+            text = r.text[:100] + "..." if len(r.text) > 100 else r.text
+            print(f"     Response: {text}")
+        else:
+            print(f"     ✗ Failed")
+            print(f"     Response: {r.text[:200]}")
     
     print("\n" + "="*60)
 
@@ -2,10 +2,56 @@
 """
 Debug server startup with verbose logging
 """
-import subprocess
+import asyncio
 import sys
 import os
 
+try:
+    import uvloop  # Installed with uvicorn[standard] on non-Windows platforms
+except ImportError:
+    uvloop = None
+
+# Stream reader buffer; large enough that long log lines never stall the child
+STREAM_LIMIT = 1 << 20
+
+async def stream_server_output(cmd, env):
+    """Run the server and echo its output, flagging known error patterns"""
+    process = await asyncio.create_subprocess_exec(
+        *cmd,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        limit=STREAM_LIMIT
+    )
+    
+    try:
+        # Print output line by line
+        while True:
+            raw = await process.stdout.readline()
+            if not raw:
+                break
+            line = raw.decode('utf-8', errors='replace')
+            print(line, end='')
+            
+            # Check for specific error patterns
+            if "Failed to initialize" in line:
+                print("\n" + "!"*60)
+                print("! INITIALIZATION ERROR DETECTED!")
+                print("!"*60)
+            elif "Failed to include routers" in line:
+                print("\n" + "!"*60)
+                print("! ROUTER REGISTRATION ERROR DETECTED!")
+                print("!"*60)
+            elif "traceback" in line.lower():
+                print("\n" + "!"*60)
+                print("! EXCEPTION TRACEBACK DETECTED!")
+                print("!"*60)
+        
+        await process.wait()
+    finally:
+        if process.returncode is None:
+            process.terminate()
+
 def start_debug_server():
     """Start server with maximum debugging output"""
     print("="*60)
@@ -37,35 +83,12 @@ def start_debug_server():
     print("Server output:")
     print("-"*60)
     
+    # uvloop.run replaces the deprecated uvloop.install() + asyncio.run()
+    run = uvloop.run if uvloop is not None else asyncio.run
+    
     try:
         # Run with real-time output
-        process = subprocess.Popen(
-            cmd,
-            env=env,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1
-        )
-        
-        # Print output line by line
-        for line in process.stdout:
-            print(line, end='')
-            
-            # Check for specific error patterns
-            if "Failed to initialize" in line:
-                print("\n" + "!"*60)
-                print("! INITIALIZATION ERROR DETECTED!")
-                print("!"*60)
-            elif "Failed to include routers" in line:
-                print("\n" + "!"*60)
-                print("! ROUTER REGISTRATION ERROR DETECTED!")
-                print("!"*60)
-            elif "traceback" in line.lower():
-                print("\n" + "!"*60)
-                print("! EXCEPTION TRACEBACK DETECTED!")
-                print("!"*60)
-                
+        run(stream_server_output(cmd, env))
     except KeyboardInterrupt:
         print("\n" + "="*60)
         print("Server stopped by user")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+"""
+ChatDisplay rendering checks for large code blocks
+
+Large blocks are highlighted on a pool thread and swapped in afterwards;
+text rendered after them must survive the swap.
+"""
+import sys
+import os
+
+import pytest
+
+# Must be set before Qt is imported
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+pytest.importorskip("PySide6")
+
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QThreadPool
+
+# Add parent directory to path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from ui.chat import chat_display
+from ui.chat.chat_display import ChatDisplay, ASYNC_HIGHLIGHT_MIN_LINES
+
+APP = QApplication.instance() or QApplication(sys.argv)
+
+CODE_BLOCK = "```python\n" + "\n".join(
+    f"value_{i} = {i}" for i in range(ASYNC_HIGHLIGHT_MIN_LINES + 10)
+) + "\n```"
+
+
+def wait_for_highlights():
+    """Let pool tasks finish and deliver their queued results"""
+    QThreadPool.globalInstance().waitForDone()
+    APP.processEvents()
+
+
+def test_text_after_async_block_survives():
+    """Text after a large code block is kept when its highlighting lands"""
+    display = ChatDisplay()
+    display.add_message("assistant", CODE_BLOCK + "\n\nTrailing paragraph")
+    display.add_message("user", "Follow-up question")
+    assert display._pending_highlights, "block should be highlighted asynchronously"
+
+    wait_for_highlights()
+
+    text = display.toPlainText()
+    assert not display._pending_highlights
+    assert "value_49 = 49" in text
+    assert "Trailing paragraph" in text
+    assert "Follow-up question" in text
+
+
+def test_streaming_block_is_highlighted_inline():
+    """Streaming messages do not defer highlighting, so their offsets stay valid"""
+    display = ChatDisplay()
+    display.add_message("assistant", "", streaming=True)
+    display.update_streaming_message(CODE_BLOCK + "\nAfter the code\nmore")
+    display.finish_streaming()
+    assert not display._pending_highlights
+
+    wait_for_highlights()
+
+    text = display.toPlainText()
+    assert "value_49 = 49" in text
+    assert "After the code" in text
+    assert text.rstrip().endswith("more")
+
+
+def test_tail_code_block_keeps_its_id():
+    """Re-rendering the unfinished tail reuses its code block id"""
+    display = ChatDisplay()
+    display.add_message("assistant", "", streaming=True)
+    content = "Intro\n```python\nx = 1\n```"
+    for word in ("", " and", " more", " words"):
+        content += word
+        display.render_streaming_content(content)
+    assert list(display.code_blocks) == [0]
+
+    display.update_streaming_message(content + "\nDone")
+    display.finish_streaming()
+    assert list(display.code_blocks) == [0]
+    assert display._next_code_block_id == 1
+
+
+def test_collapsed_messages_expand_again():
+    """Messages collapsed past MAX_LIVE_MESSAGES can be re-rendered in place"""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(chat_display, "MAX_LIVE_MESSAGES", 3)
+        display = ChatDisplay()
+        for i in range(6):
+            display.add_message("user", f"message {i}\n```\nline {i}\n```\nafter {i}")
+        assert display.toPlainText().count("[earlier message") == 3
+
+        while display._archived_messages:
+            display.expand_message(display._archived_messages.pop())
+
+        text = display.toPlainText()
+        assert "[earlier message" not in text
+        assert all(f"after {i}" in text for i in range(6))
+
+
+def test_history_is_trimmed_by_message():
+    """Past MAX_MESSAGES whole messages are dropped from the top, never partial ones"""
+    with pytest.MonkeyPatch.context() as mp:
+        # Small limits keep the document short
+        mp.setattr(chat_display, "MAX_MESSAGES", 12)
+        mp.setattr(chat_display, "MAX_LIVE_MESSAGES", 5)
+        display = ChatDisplay()
+        total = 20
+        for i in range(total):
+            display.add_message("user", f"message {i}\n```\nline {i}\n```")
+        display.add_message("assistant", "", streaming=True)
+        display.update_streaming_message("streaming reply")
+        display.finish_streaming()
+
+        assert len(display._archived_messages) + len(display._live_messages) == 12
+        text = display.toPlainText()
+        assert text.startswith("👤 You")
+        assert text.count("👤 You") + text.count("🤖 Assistant") == 12
+        assert "line %d" % (total - 1) in text
+        assert text.rstrip().endswith("streaming reply")
+
+
+if __name__ == "__main__":
+    test_text_after_async_block_survives()
+    test_streaming_block_is_highlighted_inline()
+    test_tail_code_block_keeps_its_id()
+    test_collapsed_messages_expand_again()
+    test_history_is_trimmed_by_message()
+    print("✅ ChatDisplay checks passed")
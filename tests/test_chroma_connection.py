@@ -6,6 +6,15 @@ import os
 import sys
 import chromadb
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+def collection_info(coll):
+    """(name, count, metadata, error) for one collection"""
+    try:
+        metadata = coll.metadata if hasattr(coll, 'metadata') else {}
+        return coll.name, coll.count(), metadata, None
+    except Exception as e:
+        return coll.name, None, None, e
 
 def test_chroma_connection():
     """Test direct connection to ChromaDB"""
@@ -46,17 +55,20 @@ def test_chroma_connection():
                 collections = client.list_collections()
                 print(f"  Collections found: {len(collections)}")
                 
-                for coll in collections:
-                    try:
-                        count = coll.count()
-                        print(f"    - {coll.name}: {count} vectors")
-                        
-                        # Get metadata
-                        metadata = coll.metadata if hasattr(coll, 'metadata') else {}
-                        if metadata:
-                            print(f"      Metadata: {metadata}")
-                    except Exception as e:
-                        print(f"    - {coll.name}: Error getting count: {e}")
+                # count() is a separate backend round trip per collection;
+                # run them together and print in listing order
+                with ThreadPoolExecutor(max_workers=8) as executor:
+                    infos = list(executor.map(collection_info, collections))
+                
+                for name, count, metadata, error in infos:
+                    if error is not None:
+                        print(f"    - {name}: Error getting count: {error}")
+                        continue
+                    print(f"    - {name}: {count} vectors")
+                    if metadata:
+                        print(f"      Metadata: {metadata}")
+                
+                print(f"  Total vectors: {sum(c for _, c, _, e in infos if e is None)}")
                 
                 print(f"  ✅ Successfully connected to ChromaDB at {resolved}")
                 return True
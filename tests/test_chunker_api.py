@@ -1,42 +1,47 @@
-import requests
-import json
+import httpx
+import sys
+import orjson
+from _http import SESSION, health
 
 # Test chunker API
 base_url = "http://localhost:7001"
 
+# Indent JSON only when someone is reading it
+JSON_OPTIONS = orjson.OPT_INDENT_2 if sys.stdout.isatty() or '--verbose' in sys.argv else 0
+
 print("Testing Chunker API...")
 print("-" * 50)
 
 try:
     # Test health
-    response = requests.get(f"{base_url}/health")
+    response = health()
     print(f"Health Check: {response.status_code}")
     if response.status_code == 200:
-        print(f"Response: {response.json()}")
+        print(f"Response: {orjson.loads(response.content)}")
     print()
     
     # Test strategies endpoint
     print("Testing /api/chunkers/strategies...")
-    response = requests.get(f"{base_url}/api/chunkers/strategies")
+    response = SESSION.get(f"{base_url}/api/chunkers/strategies")
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
-        data = response.json()
-        print(f"Response: {json.dumps(data, indent=2)}")
+        data = orjson.loads(response.content)
+        print(f"Response: {orjson.dumps(data, option=JSON_OPTIONS).decode()}")
     else:
         print(f"Error: {response.text}")
     print()
     
     # Test params endpoint
     print("Testing /api/chunkers/params...")
-    response = requests.get(f"{base_url}/api/chunkers/params")
+    response = SESSION.get(f"{base_url}/api/chunkers/params")
     print(f"Status Code: {response.status_code}")
     if response.status_code == 200:
-        data = response.json()
-        print(f"Response: {json.dumps(data, indent=2)}")
+        data = orjson.loads(response.content)
+        print(f"Response: {orjson.dumps(data, option=JSON_OPTIONS).decode()}")
     else:
         print(f"Error: {response.text}")
         
-except requests.ConnectionError:
+except httpx.ConnectError:
     print("Cannot connect to server. Is it running?")
 except Exception as e:
     print(f"Error: {e}")
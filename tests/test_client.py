@@ -4,15 +4,16 @@ RAG Service Test Client
 Tests basic operations of the RAG service
 """
 
-import requests
 import json
 import time
+from concurrent.futures import ThreadPoolExecutor
+from _http import SESSION, health, server_up, warmup
 
 BASE_URL = "http://localhost:7001"
 
 def testHealth():
     print("Testing /health endpoint...")
-    res = requests.get(f"{BASE_URL}/health")
+    res = health()
     print(f"Status: {res.status_code}")
     print(f"Response: {res.json()}\n")
 
@@ -22,18 +23,20 @@ def testIngest():
     with open("sample_docs.json", "r") as f:
         payload = json.load(f)
     
-    res = requests.post(f"{BASE_URL}/ingest", json=payload)
+    res = SESSION.post(f"{BASE_URL}/ingest", json=payload)
     print(f"Status: {res.status_code}")
     print(f"Response: {res.json()}\n")
     return res.status_code == 200
 
-def testAsk(question: str, k: int = None):
-    print(f"Testing /ask endpoint with question: '{question}'")
+def fetchAnswer(question: str, k: int = None):
     payload = {"question": question}
     if k is not None:
         payload["k"] = k
     
-    res = requests.post(f"{BASE_URL}/ask", json=payload)
+    return SESSION.post(f"{BASE_URL}/ask", json=payload)
+
+def printAnswer(question: str, res):
+    print(f"Testing /ask endpoint with question: '{question}'")
     print(f"Status: {res.status_code}")
     if res.status_code == 200:
         data = res.json()
@@ -44,13 +47,20 @@ def testAsk(question: str, k: int = None):
     else:
         print(f"Error: {res.text}\n")
 
+def testAsk(question: str, k: int = None):
+    printAnswer(question, fetchAnswer(question, k))
+
 def main():
     print("=" * 60)
     print("RAG Service Test Client")
     print("=" * 60 + "\n")
     
     # Test health
+    if not server_up():
+        print("Server is not reachable on port 7001")
+        return
     testHealth()
+    warmup()
     
     # Test ingestion
     print("Ingesting sample documents...")
@@ -66,9 +76,13 @@ def main():
             "What are LLM integration patterns?"
         ]
         
-        for q in questions:
-            testAsk(q, k=3)
-            time.sleep(0.5)  # Avoid overwhelming the service
+        # Questions are independent, so send them together over the pooled
+        # session and print the answers in the original order
+        with ThreadPoolExecutor(max_workers=len(questions)) as executor:
+            responses = list(executor.map(lambda q: fetchAnswer(q, k=3), questions))
+        
+        for q, res in zip(questions, responses):
+            printAnswer(q, res)
     
     print("Test completed!")
 
@@ -9,6 +9,8 @@ import json
 import time
 from pathlib import Path
 
+import numpy as np
+
 # Add paths
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(os.path.dirname(__file__), 'rag'))
@@ -46,37 +48,45 @@ def test_namespace_switching():
         }
     ]
     
-    print("\n1. Creating ChromaDB stores for different models...")
-    stores = {}
+    print("\n1. Opening one ChromaDB client and visiting each model's namespace...")
+    
+    # A single store (and chromadb client) is shared; only the namespace rotates
+    store = ChromaVectorStore(
+        persist_directory="./test_chroma_db",
+        collection_name="test_documents",
+        embedding_model=models[0]['name'],
+        embedding_dim=models[0]['dim']
+    )
+    
+    def visit(model):
+        """Switch the shared store to model's namespace and snapshot it"""
+        store.switch_namespace(model['name'], model['dim'])
+        return {"namespace": store.collection_name, "count": store.count()}
     
+    snapshots = {}
     for model in models:
-        print(f"\n   Creating store for: {model['name']}")
-        store = ChromaVectorStore(
-            persist_directory="./test_chroma_db",
-            collection_name="test_documents",
-            embedding_model=model['name'],
-            embedding_dim=model['dim']
-        )
-        stores[model['name']] = store
+        print(f"\n   Namespace for: {model['name']}")
+        snapshots[model['name']] = visit(model)
         
         # Check if this namespace already has data
-        count = store.count()
-        print(f"   Namespace: {store.collection_name}")
-        print(f"   Existing documents: {count}")
+        print(f"   Namespace: {snapshots[model['name']]['namespace']}")
+        print(f"   Existing documents: {snapshots[model['name']]['count']}")
     
     print("\n2. Testing namespace isolation...")
     
     # Add test data to first model's namespace
     first_model = models[0]
-    store1 = stores[first_model['name']]
+    visit(first_model)
     
-    if store1.count() == 0:
+    if store.count() == 0:
         print(f"\n   Adding test documents to {first_model['name']} namespace...")
         # For testing, we'll use dummy vectors
         from core.types import Chunk
         
         chunks = []
-        vectors = []
+        # Dummy vectors (in real use, these would come from embedder),
+        # built as one contiguous float32 block instead of per-doc lists
+        vectors = np.full((len(test_docs), first_model['dim']), 0.1, dtype=np.float32)
         
         for doc in test_docs:
             chunk = Chunk(
@@ -86,24 +96,23 @@ def test_namespace_switching():
                 meta={"source": "test"}
             )
             chunks.append(chunk)
-            # Dummy vector (in real use, this would come from embedder)
-            vectors.append([0.1] * first_model['dim'])
         
-        store1.addMany(chunks, vectors)
+        # addMany takes List[List[float]]; convert only at the call site
+        store.addMany(chunks, vectors.tolist())
         print(f"   Added {len(chunks)} documents")
     
     print("\n3. Verifying namespace isolation...")
     
-    for model_name, store in stores.items():
-        count = store.count()
-        print(f"\n   {model_name}:")
-        print(f"     Documents: {count}")
-        print(f"     Namespace: {store.collection_name}")
+    for model in models:
+        snapshot = visit(model)
+        print(f"\n   {model['name']}:")
+        print(f"     Documents: {snapshot['count']}")
+        print(f"     Namespace: {snapshot['namespace']}")
     
     print("\n4. Listing all namespaces...")
     
     manager = NamespaceManager("test_documents")
-    namespaces = manager.list_available_namespaces(store1.client)
+    namespaces = manager.list_available_namespaces(store.client)
     
     print("\n   Available namespaces:")
     for ns in namespaces:
@@ -113,27 +122,20 @@ def test_namespace_switching():
     
     print("\n5. Testing namespace switching...")
     
-    # Create a store and switch between models
-    switchable_store = ChromaVectorStore(
-        persist_directory="./test_chroma_db",
-        collection_name="test_documents",
-        embedding_model=models[0]['name'],
-        embedding_dim=models[0]['dim']
-    )
-    
-    print(f"\n   Initial namespace: {switchable_store.collection_name}")
-    print(f"   Documents: {switchable_store.count()}")
+    visit(models[0])
+    print(f"\n   Initial namespace: {store.collection_name}")
+    print(f"   Documents: {store.count()}")
     
     # Switch to second model
     print(f"\n   Switching to {models[1]['name']}...")
-    success = switchable_store.switch_namespace(
+    success = store.switch_namespace(
         models[1]['name'],
         models[1]['dim']
     )
     
     if success:
-        print(f"   New namespace: {switchable_store.collection_name}")
-        print(f"   Documents: {switchable_store.count()}")
+        print(f"   New namespace: {store.collection_name}")
+        print(f"   Documents: {store.count()}")
     else:
         print("   Switch failed!")
     
@@ -3,23 +3,27 @@
 Test ChromaDB persistence and Reranker functionality
 """
 
-import requests
-import json
+import orjson
 import time
 import sys
 import os
+from textwrap import shorten
+from _http import SESSION, post_json, server_up
+from _log import Section, banner
+from _fixtures import ensure_corpus, query_vectors
 
 def test_persistence_and_reranking():
     base_url = "http://localhost:7001"
     
-    print("="*60)
-    print("Testing ChromaDB Persistence & Reranker")
-    print("="*60)
+    print(banner("Testing ChromaDB Persistence & Reranker"))
     
     # 1. Check if server is running
     print("\n1. Checking server...")
+    if not server_up():
+        print("❌ Cannot connect to server")
+        return
     try:
-        response = requests.get(f"{base_url}/health")
+        response = SESSION.get(f"{base_url}/health")
         if response.status_code != 200:
             print("❌ Server not running. Start with: python start_server.py")
             return
@@ -30,14 +34,13 @@ def test_persistence_and_reranking():
     
     # 2. Check if ChromaDB already has data
     print("\n2. Testing persistence...")
-    response = requests.post(
+    response = post_json(
         f"{base_url}/ask",
-        json={"question": "test persistence chromadb"},
-        headers={"Content-Type": "application/json"}
+        json={"question": "test persistence chromadb"}
     )
     
     if response.status_code == 200:
-        data = response.json()
+        data = orjson.loads(response.content)
         ctx_ids = data.get('ctxIds', [])
         if ctx_ids:
             print(f"✅ Found {len(ctx_ids)} persisted documents in ChromaDB!")
@@ -72,30 +75,29 @@ def test_persistence_and_reranking():
         }
     ]
     
-    response = requests.post(
-        f"{base_url}/ingest",
-        json={"documents": test_docs},
-        headers={"Content-Type": "application/json"}
-    )
+    response = ensure_corpus(SESSION, test_docs)
     
-    if response.status_code == 200:
-        data = response.json()
+    if response is None:
+        print("✅ Test documents already ingested, skipping")
+    elif response.status_code == 200:
+        data = orjson.loads(response.content)
         print(f"✅ Ingested {data['documentCount']} docs into {data['ingestedChunks']} chunks")
     
     # 4. Test reranking with query
     print("\n4. Testing reranking...")
     query = "Python programming language"
     
-    response = requests.post(
-        f"{base_url}/ask",
-        json={"question": query, "k": 5},
-        headers={"Content-Type": "application/json"}
-    )
+    # Always asks the server: a cached answer would not exercise the reranker
+    payload = {"question": query, "k": 5}
+    query_vector = query_vectors([query]).get(query)
+    if query_vector is not None:
+        payload["query_vector"] = query_vector
+    response = post_json(f"{base_url}/ask", json=payload)
     
     if response.status_code == 200:
-        data = response.json()
+        data = orjson.loads(response.content)
         ctx_ids = data.get('ctxIds', [])
-        answer = data['answer'][:200] + "..." if len(data['answer']) > 200 else data['answer']
+        answer = shorten(data['answer'], width=200, placeholder="...")
         
         print(f"   Query: {query}")
         print(f"   Retrieved contexts: {len(ctx_ids)}")
@@ -106,20 +108,19 @@ def test_persistence_and_reranking():
             print("   Check server logs for reranking scores")
     
     # 5. Instructions for full test
-    print("\n" + "="*60)
-    print("FULL PERSISTENCE TEST:")
-    print("="*60)
-    print("1. Note that documents were ingested")
-    print("2. Stop the server (Ctrl+C)")
-    print("3. Check that ./chroma_db directory was created")
-    print("4. Restart the server")
-    print("5. Run this script again")
-    print("\nIf ChromaDB is working, you'll see persisted documents immediately!")
-    print("\nCheck server logs for:")
-    print("- 'Using ChromaDB vector store (persistent)'")
-    print("- 'ChromaDB: Loaded existing collection'")
-    print("- 'SimpleScoreReranker: Reranking X documents'")
-    print("="*60)
+    with Section() as log:
+        log("\n" + banner("FULL PERSISTENCE TEST:"))
+        log("1. Note that documents were ingested")
+        log("2. Stop the server (Ctrl+C)")
+        log("3. Check that ./chroma_db directory was created")
+        log("4. Restart the server")
+        log("5. Run this script again")
+        log("\nIf ChromaDB is working, you'll see persisted documents immediately!")
+        log("\nCheck server logs for:")
+        log("- 'Using ChromaDB vector store (persistent)'")
+        log("- 'ChromaDB: Loaded existing collection'")
+        log("- 'SimpleScoreReranker: Reranking X documents'")
+        log("="*60)
 
 if __name__ == "__main__":
     test_persistence_and_reranking()
@@ -1,11 +1,25 @@
 #!/usr/bin/env python
 """
 Test Qt Options Widget server synchronization
+
+Runs headless by default; pass --interactive to show the widget.
 """
 
+import argparse
 import sys
 import os
-import requests
+import orjson
+from _http import SESSION
+
+parser = argparse.ArgumentParser(description="Qt Options Widget server sync test")
+parser.add_argument("--interactive", action="store_true",
+                    help="show the widget and enter the Qt event loop")
+ARGS, _ = parser.parse_known_args()
+
+# Must be set before Qt is imported; skips display/plugin setup in the fast path
+if not ARGS.interactive:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
 from PySide6.QtWidgets import QApplication, QMainWindow
 from PySide6.QtCore import Qt
 
@@ -17,7 +31,7 @@ from ui.config_manager import ConfigManager
 def check_server():
     """Check if server is running"""
     try:
-        response = requests.get("http://localhost:7001/health")
+        response = SESSION.get("http://localhost:7001/health")
         if response.status_code == 200:
             print("✅ Server is running")
             return True
@@ -29,15 +43,34 @@ def check_server():
 def check_current_strategy():
     """Check current strategy on server"""
     try:
-        response = requests.get("http://localhost:7001/api/chunkers/strategy")
+        response = SESSION.get("http://localhost:7001/api/chunkers/strategy")
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             print(f"📦 Current server strategy: {data.get('strategy', 'unknown')}")
             return data.get('strategy')
     except Exception as e:
         print(f"❌ Failed to get strategy: {e}")
     return None
 
+def check_sync(server_strategy):
+    """Build the options widget and check it picked up the server strategy"""
+    # Create config manager
+    config = ConfigManager()
+    
+    # Create options widget
+    widget = OptionsWidget(config)
+    
+    # Check if widget loaded the correct strategy
+    print(f"\nWidget strategy: {widget.currentStrategy}")
+    print(f"Combo selection: {widget.strategyCombo.currentText()}")
+    
+    synced = bool(server_strategy) and widget.currentStrategy == server_strategy
+    if synced:
+        print("✅ Widget correctly synced with server!")
+    else:
+        print("❌ Widget not synced with server")
+    return widget, synced
+
 def main():
     print("=" * 60)
     print("Qt Options Widget Server Sync Test")
@@ -45,7 +78,7 @@ def main():
     
     # Check server
     if not check_server():
-        return
+        return 1
     
     # Check current strategy
     server_strategy = check_current_strategy()
@@ -53,20 +86,10 @@ def main():
     # Create Qt app
     app = QApplication(sys.argv)
     
-    # Create config manager
-    config = ConfigManager()
-    
-    # Create options widget
-    widget = OptionsWidget(config)
+    widget, synced = check_sync(server_strategy)
     
-    # Check if widget loaded the correct strategy
-    print(f"\nWidget strategy: {widget.currentStrategy}")
-    print(f"Combo selection: {widget.strategyCombo.currentText()}")
-    
-    if server_strategy and widget.currentStrategy == server_strategy:
-        print("✅ Widget correctly synced with server!")
-    else:
-        print("❌ Widget not synced with server")
+    if not ARGS.interactive:
+        return 0 if synced else 1
     
     # Create main window for display
     window = QMainWindow()
@@ -82,7 +105,7 @@ def main():
     print("3. Use the 🔄 refresh button to sync from server")
     print("="*60)
     
-    sys.exit(app.exec())
+    return app.exec()
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,7 +1,18 @@
 import concurrent.futures
+import itertools
+import os
 import threading
 import time
 
+# DEMO_RACE=1 이면 sleep으로 경쟁 구간을 강제로 벌려 '데이터 경쟁'을 시연한다.
+# 끄면 sleep 없이 여러 구현의 실제 경합 처리량(ops/sec)을 측정한다.
+DEMO_RACE = os.environ.get("DEMO_RACE") == "1"
+
+def race_window():
+    """DEMO_RACE일 때만 다른 스레드가 끼어들 시간을 만든다"""
+    if DEMO_RACE:
+        time.sleep(0.0001)
+
 # --- 1. 주의해서 쓰면 된다는 '가변 싱글톤' ---
 # (예시로 든 'dict'처럼 '가변 상태(counter)'를 가짐)
 
@@ -11,7 +22,7 @@ class NaiveMutableSingleton:
     def __new__(cls):
         # 고전적인 싱글톤 구현
         if cls._instance is None:
-            time.sleep(0.0001) # 스레드 충돌을 유도하기 위한 약간의 딜레이
+            race_window() # 스레드 충돌을 유도하기 위한 약간의 딜레이
             cls._instance = super().__new__(cls)
             cls._instance.counter = 0 # <-- 이것이 '공유된 가변 상태'
         return cls._instance
@@ -24,11 +35,58 @@ class NaiveMutableSingleton:
         
         # --- 위험 구간 (Critical Section) ---
         # 이 시점에 다른 스레드가 끼어들어 'current_val'을 동시에 읽을 수 있음!
-        time.sleep(0.0001) # 다른 스레드가 끼어들 시간을 강제로 만듦
+        race_window() # 다른 스레드가 끼어들 시간을 강제로 만듦
         # --- 위험 구간 끝 ---
         
         self.counter = current_val + 1 # 2. 값 쓰기 (Write)
 
+    def total(self):
+        """모든 작업 스레드가 끝난 뒤 최종 값을 읽는다"""
+        return self.counter
+
+# --- 1-1. 비교용 스레드 안전 구현들 ---
+
+class LockedSingleton(NaiveMutableSingleton):
+    """읽기-수정-쓰기 전체를 Lock으로 감싼다"""
+    _instance = None
+    _lock = threading.Lock()
+
+    def increment(self):
+        with self._lock:
+            current_val = self.counter
+            race_window()
+            self.counter = current_val + 1
+
+class AtomicSingleton(NaiveMutableSingleton):
+    """itertools.count의 next()는 C 수준에서 한 번에 끝나므로 GIL 아래에서 원자적"""
+    _instance = None
+    _ticks = itertools.count()
+
+    def increment(self):
+        next(self._ticks)
+
+    def total(self):
+        # next()는 '지금까지 증가한 횟수'를 돌려준다 (읽으면서 하나 소모되므로 마지막에 한 번만 호출)
+        return next(self._ticks)
+
+class LocalThenReduceSingleton(NaiveMutableSingleton):
+    """스레드마다 따로 세고, 끝난 뒤 한 번에 합친다"""
+    _instance = None
+    _local = threading.local()
+    _partials = []
+    _partials_lock = threading.Lock()
+
+    def increment(self):
+        cell = getattr(self._local, 'cell', None)
+        if cell is None:
+            cell = self._local.cell = [0]
+            with self._partials_lock:
+                self._partials.append(cell)
+        cell[0] += 1
+
+    def total(self):
+        return sum(cell[0] for cell in self._partials)
+
 # --- 2. '에이도비'의 테스트(asyncio)가 아닌, '진짜 병렬' 테스트 ---
 # 멀티 스레드 (ThreadPoolExecutor)를 사용
 
@@ -40,30 +98,42 @@ print(f"--- '가변 싱글톤' 병렬 안정성 테스트 ---")
 print(f"{NUM_THREADS}개의 병렬 스레드(에이전트)가 싱글톤의 counter를 {NUM_TASKS_PER_THREAD}번씩 총 {TOTAL_TASKS}번 증가시킵니다.")
 #print("('내' 주장: '가변 싱글톤'은 병렬 환경에서 데이터 경쟁을 일으킨다)\n")
 
-def run_task(task_id):
-    s = NaiveMutableSingleton()
+def run_task(cls):
+    s = cls()
     for _ in range(NUM_TASKS_PER_THREAD):
         s.increment()
-    # print(f"스레드 {task_id} 완료...") # 주석 해제 시 더 복잡하게 얽힘
+    # print(f"스레드 완료...") # 주석 해제 시 더 복잡하게 얽힘
 
-# 진짜 병렬 실행
-with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
-    futures = [executor.submit(run_task, i) for i in range(NUM_THREADS)]
-    concurrent.futures.wait(futures)
+def run_parallel(cls):
+    """진짜 병렬 실행 후 (최종 값, 걸린 시간)을 돌려준다"""
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=NUM_THREADS) as executor:
+        futures = [executor.submit(run_task, cls) for _ in range(NUM_THREADS)]
+        concurrent.futures.wait(futures)
+    elapsed = time.perf_counter() - start
+    return cls().total(), elapsed
 
-# --- 3. 결과 ---
-final_counter = NaiveMutableSingleton().counter
+if DEMO_RACE:
+    final_counter, _ = run_parallel(NaiveMutableSingleton)
 
-print("\n--- 테스트 결과 ---")
-print(f"예상 최종 값 (기대 값): {TOTAL_TASKS}")
-print(f"실제 최종 값 (측정 값): {final_counter}")
+    # --- 3. 결과 ---
+    print("\n--- 테스트 결과 ---")
+    print(f"예상 최종 값 (기대 값): {TOTAL_TASKS}")
+    print(f"실제 최종 값 (측정 값): {final_counter}")
 
-if final_counter == TOTAL_TASKS:
-    print("\n결과: ✅ 성공 (이론상 거의 불가능한 확률)")
+    if final_counter == TOTAL_TASKS:
+        print("\n결과: ✅ 성공 (이론상 거의 불가능한 확률)")
+    else:
+        print(f"\n결과: ❌ 대실패! (값이 깨짐)")
+        print(f"이유: {TOTAL_TASKS - final_counter}번의 쓰기(write) 작업이 '데이터 경쟁'으로 인해 유실됨.")
+        print("이것이 '공유된 가변 상태'를 병렬로 접근할 때의 위.")
 else:
-    print(f"\n결과: ❌ 대실패! (값이 깨짐)")
-    print(f"이유: {TOTAL_TASKS - final_counter}번의 쓰기(write) 작업이 '데이터 경쟁'으로 인해 유실됨.")
-    print("이것이 '공유된 가변 상태'를 병렬로 접근할 때의 위.")
+    # --- 3. 결과: 구현별 경합 처리량 ---
+    print("\n--- 경합 처리량 비교 (DEMO_RACE=1 로 경쟁 시연) ---")
+    for cls in (NaiveMutableSingleton, LockedSingleton, AtomicSingleton, LocalThenReduceSingleton):
+        final_counter, elapsed = run_parallel(cls)
+        status = "✅" if final_counter == TOTAL_TASKS else f"❌ {TOTAL_TASKS - final_counter}번 유실"
+        print(f"{cls.__name__:26} {TOTAL_TASKS / elapsed:>14,.0f} ops/sec  최종 값 {final_counter} {status}")
 
 #print("\n--- 결론 ---")
 #print("1. `asyncio.gather` 테스트는 '단일 스레드' 비동기라 이 문제를 발견조차 못함")
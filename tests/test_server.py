@@ -3,102 +3,132 @@
 Final comprehensive test for RAG server
 Consolidates all test functionality
 """
-import requests
+import asyncio
 import time
 import sys
+import httpx
+import orjson
+from _http import BASE_URL
+from _log import Section, banner
+
+# Independent read-only probes: (path, timeout)
+PROBES = [
+    ("/health", 3),
+    ("/api/rag/stats", 5),
+    ("/api/rag/collections", 5),
+    ("/api/chunkers/strategies", 3),
+]
+
+async def probe(client, path, timeout):
+    return await client.get(path, timeout=timeout)
+
+async def fetch_probes():
+    """Run all probes concurrently; failures come back as exception objects"""
+    async with httpx.AsyncClient(base_url=BASE_URL, http2=True) as client:
+        responses = await asyncio.gather(
+            *(probe(client, path, timeout) for path, timeout in PROBES),
+            return_exceptions=True
+        )
+    return dict(zip((path for path, _ in PROBES), responses))
+
+def unwrap(response):
+    """Re-raise a probe failure so each section reports it as before"""
+    if isinstance(response, Exception):
+        raise response
+    return response
 
 def test_server():
     """Test all server endpoints"""
-    base_url = "http://localhost:7001"
     results = []
+    responses = asyncio.run(fetch_probes())
     
-    print("="*60)
-    print("RAG Server Comprehensive Test")
-    print("="*60)
+    # Responses are all in hand, so the whole report goes out in one write
+    with Section() as log:
+        log(banner("RAG Server Comprehensive Test"))
     
-    # 1. Health check
-    print("\n1. Health Check...")
-    try:
-        r = requests.get(f"{base_url}/health", timeout=3)
-        if r.status_code == 200:
-            print(f"   ✓ Health: {r.json()['status']}")
-            results.append(("Health", True))
-        else:
-            print(f"   ✗ Health failed: {r.status_code}")
+        # 1. Health check
+        log("\n1. Health Check...")
+        try:
+            r = unwrap(responses["/health"])
+            if r.status_code == 200:
+                log(f"   ✓ Health: {orjson.loads(r.content)['status']}")
+                results.append(("Health", True))
+            else:
+                log(f"   ✗ Health failed: {r.status_code}")
+                results.append(("Health", False))
+        except Exception as e:
+            log(f"   ✗ Health error: {e}")
             results.append(("Health", False))
-    except Exception as e:
-        print(f"   ✗ Health error: {e}")
-        results.append(("Health", False))
     
-    # 2. RAG Stats - THE MAIN TEST
-    print("\n2. Vector Stats API...")
-    try:
-        r = requests.get(f"{base_url}/api/rag/stats", timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            count = data.get('total_vectors', 0)
-            print(f"   ✓ Vector Count: {count:,}")
-            print(f"   ✓ Namespace: {data.get('namespace')}")
-            print(f"   ✓ Store Type: {data.get('store_type')}")
-            results.append(("Vector Stats", True))
-        else:
-            print(f"   ✗ Vector Stats failed: {r.status_code}")
+        # 2. RAG Stats - THE MAIN TEST
+        log("\n2. Vector Stats API...")
+        try:
+            r = unwrap(responses["/api/rag/stats"])
+            if r.status_code == 200:
+                data = orjson.loads(r.content)
+                count = data.get('total_vectors', 0)
+                log(f"   ✓ Vector Count: {count:,}")
+                log(f"   ✓ Namespace: {data.get('namespace')}")
+                log(f"   ✓ Store Type: {data.get('store_type')}")
+                results.append(("Vector Stats", True))
+            else:
+                log(f"   ✗ Vector Stats failed: {r.status_code}")
+                results.append(("Vector Stats", False))
+        except Exception as e:
+            log(f"   ✗ Vector Stats error: {e}")
             results.append(("Vector Stats", False))
-    except Exception as e:
-        print(f"   ✗ Vector Stats error: {e}")
-        results.append(("Vector Stats", False))
     
-    # 3. Collections
-    print("\n3. Collections API...")
-    try:
-        r = requests.get(f"{base_url}/api/rag/collections", timeout=5)
-        if r.status_code == 200:
-            data = r.json()
-            collections = data.get('collections', [])
-            print(f"   ✓ Found {len(collections)} collections")
-            for coll in collections[:3]:  # Show first 3
-                print(f"     - {coll.get('name')}: {coll.get('count', 0)} vectors")
-            results.append(("Collections", True))
-        else:
-            print(f"   ✗ Collections failed: {r.status_code}")
+        # 3. Collections
+        log("\n3. Collections API...")
+        try:
+            r = unwrap(responses["/api/rag/collections"])
+            if r.status_code == 200:
+                data = orjson.loads(r.content)
+                collections = data.get('collections', [])
+                log(f"   ✓ Found {len(collections)} collections")
+                for coll in collections[:3]:  # Show first 3
+                    log(f"     - {coll.get('name')}: {coll.get('count', 0)} vectors")
+                results.append(("Collections", True))
+            else:
+                log(f"   ✗ Collections failed: {r.status_code}")
+                results.append(("Collections", False))
+        except Exception as e:
+            log(f"   ✗ Collections error: {e}")
             results.append(("Collections", False))
-    except Exception as e:
-        print(f"   ✗ Collections error: {e}")
-        results.append(("Collections", False))
     
-    # 4. Chunker strategies
-    print("\n4. Chunker Strategies...")
-    try:
-        r = requests.get(f"{base_url}/api/chunkers/strategies", timeout=3)
-        if r.status_code == 200:
-            strategies = r.json()
-            print(f"   ✓ Available strategies: {len(strategies)}")
-            results.append(("Chunker", True))
-        else:
-            print(f"   ✗ Chunker failed: {r.status_code}")
+        # 4. Chunker strategies
+        log("\n4. Chunker Strategies...")
+        try:
+            r = unwrap(responses["/api/chunkers/strategies"])
+            if r.status_code == 200:
+                strategies = orjson.loads(r.content)
+                log(f"   ✓ Available strategies: {len(strategies)}")
+                results.append(("Chunker", True))
+            else:
+                log(f"   ✗ Chunker failed: {r.status_code}")
+                results.append(("Chunker", False))
+        except Exception as e:
+            log(f"   ✗ Chunker error: {e}")
             results.append(("Chunker", False))
-    except Exception as e:
-        print(f"   ✗ Chunker error: {e}")
-        results.append(("Chunker", False))
     
-    # Summary
-    print("\n" + "="*60)
-    print("Test Summary:")
-    passed = sum(1 for _, status in results if status)
-    total = len(results)
+        # Summary
+        log("\n" + "="*60)
+        log("Test Summary:")
+        passed = sum(1 for _, status in results if status)
+        total = len(results)
     
-    for name, status in results:
-        status_str = "✓ PASS" if status else "✗ FAIL"
-        print(f"  {name:20} {status_str}")
+        for name, status in results:
+            status_str = "✓ PASS" if status else "✗ FAIL"
+            log(f"  {name:20} {status_str}")
     
-    print(f"\nTotal: {passed}/{total} tests passed")
+        log(f"\nTotal: {passed}/{total} tests passed")
     
-    if passed == total:
-        print("\n✓✓✓ ALL TESTS PASSED! Server is fully operational.")
-    else:
-        print(f"\n⚠ {total - passed} tests failed. Check server logs.")
+        if passed == total:
+            log("\n✓✓✓ ALL TESTS PASSED! Server is fully operational.")
+        else:
+            log(f"\n⚠ {total - passed} tests failed. Check server logs.")
     
-    print("="*60)
+        log("="*60)
     
     return passed == total
 
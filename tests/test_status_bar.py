@@ -3,14 +3,18 @@
 Test Qt App status bar initialization
 """
 
-import sys
-import time
-import requests
+import asyncio
+import httpx
+import orjson
 
-def check_server_status():
+# Not imported from _http: that module builds the shared sync client at
+# import time, which this async-only script never uses
+BASE_URL = "http://localhost:7001"
+
+async def check_server_status(client):
     """Check server status"""
     try:
-        response = requests.get("http://localhost:7001/health")
+        response = await client.get("/health")
         if response.status_code == 200:
             print("✅ Server is online")
             return True
@@ -18,12 +22,12 @@ def check_server_status():
         print("❌ Server is offline")
     return False
 
-def get_current_strategy():
+async def get_current_strategy(client):
     """Get current strategy from server"""
     try:
-        response = requests.get("http://localhost:7001/api/chunkers/strategy")
+        response = await client.get("/api/chunkers/strategy")
         if response.status_code == 200:
-            data = response.json()
+            data = orjson.loads(response.content)
             strategy = data.get('strategy', 'unknown')
             print(f"📦 Current server strategy: {strategy}")
             return strategy
@@ -31,14 +35,10 @@ def get_current_strategy():
         print(f"❌ Failed to get strategy: {e}")
     return None
 
-def set_strategy(strategy):
+async def set_strategy(client, strategy):
     """Set strategy on server"""
     try:
-        response = requests.post(
-            "http://localhost:7001/api/chunkers/strategy",
-            json={"strategy": strategy},
-            headers={"Content-Type": "application/json"}
-        )
+        response = await client.post("/api/chunkers/strategy", json={"strategy": strategy})
         if response.status_code == 200:
             print(f"✅ Strategy set to: {strategy}")
             return True
@@ -46,20 +46,29 @@ def set_strategy(strategy):
         print(f"❌ Failed to set strategy: {e}")
     return False
 
-def main():
+async def main():
+    async with httpx.AsyncClient(
+        base_url=BASE_URL,
+        limits=httpx.Limits(max_connections=10, max_keepalive_connections=5),
+        http2=True,
+        timeout=5.0
+    ) as client:
+        await run(client)
+
+async def run(client):
     print("="*60)
     print("Qt App Status Bar Test")
     print("="*60)
     
-    # Check server
-    if not check_server_status():
+    # Check server and read the current strategy concurrently
+    online, current = await asyncio.gather(
+        check_server_status(client), get_current_strategy(client)
+    )
+    if not online:
         print("\nPlease start the server first:")
         print("  python start_server.py")
         return
     
-    # Get current strategy
-    current = get_current_strategy()
-    
     # Test setting different strategies
     test_strategies = ["adaptive", "sentence", "paragraph"]
     
@@ -69,11 +78,11 @@ def main():
     
     for strategy in test_strategies:
         print(f"\n1. Setting strategy to: {strategy}")
-        if set_strategy(strategy):
-            time.sleep(0.5)
+        if await set_strategy(client, strategy):
+            await asyncio.sleep(0.5)
             
             print("2. Verifying on server...")
-            server_strategy = get_current_strategy()
+            server_strategy = await get_current_strategy(client)
             
             if server_strategy == strategy:
                 print(f"✅ Server correctly shows: {server_strategy}")
@@ -84,7 +93,8 @@ def main():
             print(f"   Expected: 📦 Strategy: {strategy}")
             print("   NOT: 📦 Strategy: Loading...")
             
-            input("\nPress Enter after checking Qt App...")
+            # run_in_executor rather than asyncio.to_thread, which needs Python 3.9
+            await asyncio.get_running_loop().run_in_executor(None, input, "\nPress Enter after checking Qt App...")
     
     print("\n" + "="*60)
     print("Test complete!")
@@ -95,4 +105,4 @@ def main():
     print("="*60)
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())
@@ -1,13 +1,19 @@
 # ui/__init__.py
 """
 UI Components for RAG Qt Application
+
+Widgets are imported on first attribute access (PEP 562), so importing a
+lightweight submodule does not pull in every Qt widget module.
 """
+import importlib
 
-from .chat_widget import ChatWidget
-from .documents_widget import DocumentsWidget
-from .options_widget import OptionsWidget
-from .logs_widget import LogsWidget
-from .config_manager import ConfigManager
+_LAZY = {
+    'ChatWidget': '.chat_widget',
+    'DocumentsWidget': '.documents_widget',
+    'OptionsWidget': '.options_widget',
+    'LogsWidget': '.logs_widget',
+    'ConfigManager': '.config_manager',
+}
 
 __all__ = [
     'ChatWidget',
@@ -16,3 +22,15 @@ __all__ = [
     'LogsWidget',
     'ConfigManager'
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        obj = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,13 +1,18 @@
 # ui/chat/__init__.py
 """
 Chat widget components for RAG Qt Application
+
+Components are imported on first attribute access (PEP 562).
 """
+import importlib
 
-from .chat_message import ChatMessage
-from .chat_history import ChatHistory
-from .chat_input import ChatInput
-from .chat_worker import RagWorkerThread
-from .chat_widget import ChatWidget
+_LAZY = {
+    'ChatMessage': '.chat_message',
+    'ChatHistory': '.chat_history',
+    'ChatInput': '.chat_input',
+    'RagWorkerThread': '.chat_worker',
+    'ChatWidget': '.chat_widget',
+}
 
 __all__ = [
     'ChatMessage',
@@ -16,3 +21,15 @@ __all__ = [
     'RagWorkerThread',
     'ChatWidget'
 ]
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        obj = getattr(importlib.import_module(_LAZY[name], __name__), name)
+        globals()[name] = obj
+        return obj
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
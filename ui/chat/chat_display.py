@@ -3,20 +3,302 @@
 Enhanced chat display widget with improved code rendering
 """
 from PySide6.QtWidgets import QTextBrowser, QMenu, QApplication, QToolTip
-from PySide6.QtCore import Qt, Signal, QTimer, QUrl
-from PySide6.QtGui import QTextCursor, QTextCharFormat, QFont, QColor, QAction, QTextBlockFormat, QCursor
+from PySide6.QtCore import Qt, Signal, QTimer, QUrl, QRunnable, QThreadPool
+from PySide6.QtGui import (QTextCursor, QTextCharFormat, QFont, QColor, QAction, QTextBlockFormat,
+                           QCursor, QTextTableFormat, QTextLength)
 from .markdown_renderer import MarkdownRenderer
+from collections import OrderedDict, deque
+import contextlib
+import functools
 import re
 
+# Patterns used on every render, compiled once
+_CODE_BLOCK_RE = re.compile(r'(```[\s\S]*?```)')
+_HEADER_RE = re.compile(r'^(#{1,6})\s+(.+)')
+_BULLET_RE = re.compile(r'^(\s*)([*+-])\s+(.+)')
+_NUMBERED_RE = re.compile(r'^(\s*)(\d+)\.\s+(.+)')
+# Priority: inline code > bold > italic
+_INLINE_FORMAT_RE = re.compile(r'(`[^`]+`|\*\*[^*]+\*\*|\*[^*]+\*)')
+_BOLD_RE = re.compile(r'(\*\*[^*]+\*\*)')
+_PY_TOKEN_RE = re.compile(r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"[^"]*"|\'[^\']*\'|\b\w+\b|[^\w\s]+|\s+)')
+
+# Label shown in a code block header, keyed by lower-cased fence language
+_DISPLAY_LANGUAGES = {
+    'csharp': 'C#', 'cs': 'C#', 'cpp': 'C++', 'js': 'JavaScript', 'py': 'Python',
+    'typescript': 'TypeScript', 'ts': 'TypeScript', 'java': 'Java', 'html': 'HTML',
+    'css': 'CSS', 'sql': 'SQL', 'json': 'JSON', 'xml': 'XML', 'yaml': 'YAML',
+    'bash': 'Bash', 'shell': 'Shell', 'go': 'Go', 'rust': 'Rust', 'ruby': 'Ruby',
+    'php': 'PHP', 'swift': 'Swift', 'kotlin': 'Kotlin', 'r': 'R',
+}
+
+# Highlighter family for simple_syntax_highlight, keyed by lower-cased fence language
+_LANGUAGE_FAMILIES = {
+    'python': 'python', 'py': 'python',
+    'csharp': 'csharp', 'cs': 'csharp', 'c#': 'csharp',
+    'javascript': 'javascript', 'js': 'javascript',
+    'typescript': 'typescript', 'ts': 'typescript',
+    'java': 'c', 'cpp': 'c', 'c++': 'c', 'c': 'c',
+}
+_SLASH_COMMENT_FAMILIES = frozenset({'csharp', 'javascript', 'typescript', 'c'})
+
+# One numbered code row; {cell_width} is filled per block, %s per line
+_CODE_ROW_TEMPLATE = (
+    '<tr>'
+    '<td style="width:{cell_width}px;text-align:right;color:#999;font-size:12px;'
+    "font-family:'Consolas','Courier New',monospace;user-select:none;padding:0 8px;"
+    'border-right:1px solid #e0e0e0;vertical-align:top;white-space:pre;">%s</td>'
+    '<td style="padding-left:12px;font-size:13px;color:#333;white-space:pre;font-family:inherit;">%s</td>'
+    '</tr>'
+)
+# Container and language/copy bar; filled with (label, block id, block id)
+_CODE_BLOCK_HEADER = '''
+        <div style="margin:10px 0;font-family:'Cascadia Code','Fira Code',Monaco,monospace;">
+            <div style="border-top:1px solid #d0d0d0;padding:8px 12px;display:flex;justify-content:space-between;align-items:center;background:#f5f5f5;">
+                <span style="color:#0969da;font-size:13px;font-weight:600;font-family:'Segoe UI',system-ui,-apple-system,sans-serif;">%s</span>
+                <a href="copy:%d" id="copy-btn-%d" style="background:#ffffff;color:#24292f;text-decoration:none;font-size:13px;padding:5px 12px;border-radius:6px;border:1px solid #d1d9e0;font-weight:500;display:inline-flex;align-items:center;gap:6px;font-family:'Segoe UI',system-ui,-apple-system,sans-serif;transition:all 0.2s;">Copy</a>
+            </div>
+            <div style="background:#f8f8f8;padding:12px;overflow-x:auto;">
+        '''
+_CODE_TABLE_OPEN = '<table style="width:100%;border-collapse:collapse;">'
+_CODE_TABLE_CLOSE = '</table>'
+# Unhighlighted body for oversized or still-streaming blocks
+_CODE_PRE_OPEN = (
+    '<pre style="margin:0;font-size:13px;color:#333;'
+    "font-family:'Consolas','Courier New',monospace;\">"
+)
+_CODE_PRE_CLOSE = '</pre>'
+_CODE_BLOCK_CLOSE = '</div><div style="border-bottom:1px solid #d0d0d0;margin-top:8px;"></div></div>'
+
+# Token classes for simple_syntax_highlight: quoted strings (an unterminated
+# one runs to end of line), numbers, identifiers, and any other single character
+_HL_TOKEN_RE = re.compile(
+    r"""(?P<str>(?P<q>["'])(?:(?!(?P=q))[^\\]|\\[\s\S]?)*(?P=q)?)"""
+    r"""|(?P<num>\d[\d.xXbBoO]*)"""
+    r"""|(?P<word>[^\W\d]\w*)"""
+    r"""|(?P<other>[\s\S])"""
+)
+
+# Entity table for code text; single-character tokens use the dict directly
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'})
+_ESCAPED_CHAR = {c: c.translate(_HTML_ESCAPE) for c in '&<>"\''}
+
+# Span openers for simple_syntax_highlight, one per token colour
+_SPAN_COMMENT = '<span style="color:#008000;">'
+_SPAN_STR = '<span style="color:#a31515;">'
+_SPAN_NUM = '<span style="color:#098658;">'
+_SPAN_KW = '<span style="color:#0000ff;">'
+_SPAN_TYPE = '<span style="color:#2b91af;">'
+_SPAN_FUNC = '<span style="color:#795e26;">'
+_SPAN_PLAIN = '<span style="color:#000000;">'
+_SPAN_END = '</span>'
+
+# Word classes for simple_syntax_highlight
+_CS_KEYWORDS = frozenset({
+    'using', 'namespace', 'public', 'private', 'protected', 'internal',
+    'class', 'struct', 'interface', 'enum', 'static', 'void', 'int',
+    'string', 'bool', 'double', 'float', 'if', 'else', 'for', 'foreach',
+    'while', 'return', 'new', 'this', 'var', 'const', 'readonly'
+})
+_CS_TYPES = frozenset({'int', 'string', 'bool', 'double', 'float', 'void', 'var'})
+_PY_HL_KEYWORDS = frozenset({
+    'def', 'class', 'if', 'elif', 'else', 'for', 'while', 'return',
+    'import', 'from', 'as', 'try', 'except', 'finally', 'with', 'lambda',
+    'pass', 'break', 'continue', 'global', 'nonlocal', 'assert', 'yield'
+})
+_PY_BUILTINS = frozenset({'True', 'False', 'None', 'print', 'len', 'range', 'int', 'str', 'list'})
+_JS_KEYWORDS = frozenset({
+    'function', 'const', 'let', 'var', 'if', 'else', 'for', 'while', 'return',
+    'class', 'extends', 'new', 'this', 'import', 'export', 'from', 'as',
+    'async', 'await', 'try', 'catch', 'finally', 'throw', 'typeof', 'instanceof'
+})
+_TS_TYPES = frozenset({'string', 'number', 'boolean', 'any', 'void', 'interface', 'type', 'enum'})
+_NO_WORDS = frozenset()
+
+# Keyword and type/builtin sets per highlighter family
+_HL_KEYWORDS = {
+    'csharp': _CS_KEYWORDS,
+    'python': _PY_HL_KEYWORDS,
+    'javascript': _JS_KEYWORDS,
+    'typescript': _JS_KEYWORDS,
+}
+_HL_TYPES = {
+    'csharp': _CS_TYPES,
+    'python': _PY_BUILTINS,
+    'typescript': _TS_TYPES,
+}
+
+# History bounds for long sessions
+MAX_MESSAGES = 500
+MAX_CODE_BLOCKS = 500
+MAX_LIVE_MESSAGES = 200  # Older messages are collapsed to a placeholder line
+CODE_HTML_CACHE_SIZE = 256
+LINE_HTML_CACHE_SIZE = 8192  # Highlighted code lines, shared by all displays
+RENDERED_CACHE_SIZE = 128  # Rendered message fragments kept for re-display
+ASYNC_HIGHLIGHT_MIN_LINES = 40  # Smaller code blocks are highlighted inline
+PLAIN_CODE_MAX_LINES = 500  # Larger code blocks are shown without highlighting
+PLAIN_CODE_MAX_CHARS = 50_000
+
+_PY_KEYWORDS = frozenset({
+    'def', 'class', 'if', 'elif', 'else', 'for', 'while', 'return',
+    'import', 'from', 'as', 'try', 'except', 'finally', 'with',
+    'lambda', 'pass', 'break', 'continue', 'global', 'nonlocal',
+    'assert', 'yield', 'raise', 'del', 'in', 'is', 'not', 'and', 'or',
+    'True', 'False', 'None'
+})
+
+
+@functools.lru_cache(maxsize=LINE_HTML_CACHE_SIZE)
+def _highlight_code_part(code_part: str, family: str) -> str:
+    """Highlighted HTML for a code line without its leading whitespace
+    
+    Cached so lines re-rendered when an open streaming block closes, or
+    that repeat across blocks, are tokenized once. Thread-safe for the
+    highlight pool.
+    """
+    # Check for comments first
+    if family == 'python' and code_part.strip().startswith('#'):
+        return _SPAN_COMMENT + code_part.translate(_HTML_ESCAPE) + _SPAN_END
+    elif family in _SLASH_COMMENT_FAMILIES:
+        if code_part.strip().startswith('//'):
+            return _SPAN_COMMENT + code_part.translate(_HTML_ESCAPE) + _SPAN_END
+    
+    # Process the code part
+    keywords = _HL_KEYWORDS.get(family, _NO_WORDS)
+    types = _HL_TYPES.get(family, _NO_WORDS)
+    result = []
+    append = result.append
+    for match in _HL_TOKEN_RE.finditer(code_part):
+        token = match.group()
+        kind = match.lastgroup
+        if kind == 'str':
+            append(_SPAN_STR)
+            append(token.translate(_HTML_ESCAPE))
+        elif kind == 'num':
+            append(_SPAN_NUM)
+            append(token)
+        elif kind == 'word':
+            # Check if it's a keyword
+            if token in keywords:
+                append(_SPAN_KW)
+            elif token in types:
+                append(_SPAN_TYPE)
+            # Check if it's a function/method call (followed by parenthesis)
+            elif code_part.startswith('(', match.end()):
+                append(_SPAN_FUNC)
+            else:
+                append(_SPAN_PLAIN)
+            append(token)
+        # Handle operators and other characters
+        else:
+            append(_SPAN_PLAIN)
+            append(_ESCAPED_CHAR.get(token, token))
+        append(_SPAN_END)
+    
+    return ''.join(result)
+
+
+def _indent_c_style(lines: list, indent_size: int = 4) -> list:
+    """Re-indent C-style code by tracking { and }"""
+    corrected_lines = []
+    indent_level = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            corrected_lines.append('')
+            continue
+        
+        # Check for closing brace first
+        if stripped.startswith('}'):
+            if indent_level > 0:
+                indent_level -= 1
+            corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
+            # Check if there's an opening brace on the same line after the closing brace
+            if '{' in stripped[1:]:
+                indent_level += 1
+        else:
+            # Normal line
+            corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
+            
+            # Count braces
+            indent_level += stripped.count('{') - stripped.count('}')
+            
+            # Ensure indent_level doesn't go negative
+            if indent_level < 0:
+                indent_level = 0
+    
+    return corrected_lines
+
+
+def _indent_python_style(lines: list, indent_size: int = 4) -> list:
+    """Re-indent Python code: indent after ':', dedent for specific keywords"""
+    corrected_lines = []
+    indent_level = 0
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            corrected_lines.append('')
+            continue
+        
+        # Check for dedent keywords first
+        if stripped.startswith(('return', 'break', 'continue', 'pass')):
+            corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
+            if indent_level > 0 and not stripped.endswith(':'):
+                indent_level -= 1
+        elif stripped.startswith(('elif', 'else', 'except', 'finally')):
+            if indent_level > 0:
+                indent_level -= 1
+            corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
+            if stripped.endswith(':'):
+                indent_level += 1
+        else:
+            corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
+            # Check if line ends with : (new block)
+            if stripped.endswith(':'):
+                indent_level += 1
+    
+    return corrected_lines
+
+
+class _HighlightTask(QRunnable):
+    """Builds a code block's highlighted rows on a pool thread"""
+    
+    def __init__(self, display, index: int, body: str, language: str):
+        super().__init__()
+        self.display = display
+        self.index = index
+        self.body = body
+        self.language = language
+    
+    def run(self):
+        code_content, rows_html = self.display._code_block_rows(self.body, self.language)
+        try:
+            self.display.codeBlockHighlighted.emit(self.index, code_content, rows_html)
+        except RuntimeError:
+            # The display was deleted while the task ran
+            pass
+
 
 class ChatDisplay(QTextBrowser):
     """Enhanced chat display with markdown support"""
     
+    # Code block id, corrected code, highlighted rows (emitted from pool threads)
+    codeBlockHighlighted = Signal(int, str, str)
+    
     def __init__(self, config_manager=None):
         super().__init__()
         self.config = config_manager
         self.setReadOnly(True)
-        self.setAcceptRichText(True)
+        
+        # Code blocks past either limit skip highlighting; lower them on slow machines
+        if config_manager:
+            self._plain_code_max_lines = config_manager.get("ui.plain_code_max_lines", PLAIN_CODE_MAX_LINES, "app")
+            self._plain_code_max_chars = config_manager.get("ui.plain_code_max_chars", PLAIN_CODE_MAX_CHARS, "app")
+        else:
+            self._plain_code_max_lines = PLAIN_CODE_MAX_LINES
+            self._plain_code_max_chars = PLAIN_CODE_MAX_CHARS
+        # Content is only added programmatically, so skip the undo stack
+        self.setUndoRedoEnabled(False)
+        self.document().setUndoRedoEnabled(False)
         
         # Setup markdown renderer with config
         self.markdown_renderer = MarkdownRenderer(self, config_manager)
@@ -34,9 +316,34 @@ class ChatDisplay(QTextBrowser):
         self.anchorClicked.connect(self.handle_anchor_click)
         
         # Message tracking
-        self.messages = []
+        self.messages = deque(maxlen=MAX_MESSAGES)
+        self._finalized = deque(maxlen=MAX_MESSAGES)  # Completed messages as {'role', 'content'} for export
         self.current_streaming_message = None
-        self.code_blocks = []  # Store code blocks for copying
+        self.code_blocks = {}  # Code block id -> code, for copying
+        self._next_code_block_id = 0
+        
+        # Per-widget cache of highlighted code block rows
+        self._code_block_rows = functools.lru_cache(maxsize=CODE_HTML_CACHE_SIZE)(self.build_code_block_rows)
+        
+        # Large code blocks are highlighted off the UI thread; id -> (placeholder cursor, header html)
+        self._pending_highlights = {}
+        self.codeBlockHighlighted.connect(self._apply_highlight)
+        
+        # Streaming updates are coalesced and rendered at most once per interval
+        self._pending_content = None
+        self._flush_interval_ms = 50
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.timeout.connect(self._flush_streaming)
+        
+        # Only the newest messages stay fully rendered; older ones are
+        # collapsed and re-rendered when scrolled back into view
+        self._live_messages = deque()
+        self._archived_messages = []  # Collapsed messages, oldest first
+        self._expanding = False
+        # Message content -> rendered QTextDocumentFragment, most recent last
+        self._rendered_cache = OrderedDict()
+        self.verticalScrollBar().valueChanged.connect(self._on_scroll)
         
     def setup_styles(self):
         """Setup display styles"""
@@ -55,6 +362,60 @@ class ChatDisplay(QTextBrowser):
             }
         """)
         
+        # Character formats shared by every render; insertText() copies them
+        code_font = "Consolas, Monaco, monospace"
+        self._fmt_py_keyword = self._char_format("#cf222e", family=code_font, size=9, bold=True)
+        self._fmt_py_string = self._char_format("#0a3069", family=code_font, size=9)
+        self._fmt_py_comment = self._char_format("#6e7781", family=code_font, size=9, italic=True)
+        self._fmt_py_function = self._char_format("#8250df", family=code_font, size=9)
+        self._fmt_code_default = self._char_format("#24292e", family=code_font, size=9)
+        self._fmt_line_number = self._char_format("#999999", family=code_font, size=9)
+        
+        # Table for a code block that is still streaming in
+        self._open_code_table_format = QTextTableFormat()
+        self._open_code_table_format.setBorder(0)
+        self._open_code_table_format.setCellPadding(2)
+        self._open_code_table_format.setBackground(QColor("#f8f8f8"))
+        self._open_code_table_format.setWidth(QTextLength(QTextLength.PercentageLength, 100))
+        self._open_code_table_format.setColumnWidthConstraints([
+            QTextLength(QTextLength.FixedLength, 40),
+            QTextLength(QTextLength.VariableLength, 0),
+        ])
+        
+        self._fmt_inline_code = self._char_format("#24292e", family=code_font, size=9, background="#f6f8fa")
+        self._fmt_inline_code_bold = self._char_format("#24292e", family=code_font, size=9, background="#f6f8fa", bold=True)
+        self._fmt_text = self._char_format("#000000")
+        self._fmt_bold = self._char_format("#000000", bold=True)
+        self._fmt_italic = self._char_format("#000000", italic=True)
+        self._fmt_role_user = self._char_format("#0066cc", size=11, bold=True)
+        self._fmt_role_assistant = self._char_format("#000000", size=11, bold=True)  # Black for assistant
+        self._fmt_placeholder = self._char_format("#9a9a9a", italic=True)
+        
+        # H1: 18pt, H2: 16pt, H3: 14pt, H4: 12pt, H5-H6: 11pt
+        base_size = 10
+        self._fmt_headers = {
+            level: self._char_format("#000000", size=base_size + offset, bold=True)
+            for level, offset in ((1, 8), (2, 6), (3, 4), (4, 2), (5, 1), (6, 1))
+        }
+    
+    @staticmethod
+    def _char_format(color: str, family: str = None, size: float = None, bold: bool = False,
+                     italic: bool = False, background: str = None) -> QTextCharFormat:
+        """Build a QTextCharFormat from the handful of properties the renderers use"""
+        fmt = QTextCharFormat()
+        if family:
+            fmt.setFontFamily(family)
+        if size:
+            fmt.setFontPointSize(size)
+        if background:
+            fmt.setBackground(QColor(background))
+        fmt.setForeground(QColor(color))
+        if bold:
+            fmt.setFontWeight(QFont.Bold)
+        if italic:
+            fmt.setFontItalic(True)
+        return fmt
+        
     def add_message(self, role: str, content: str, streaming: bool = False):
         """Add a message to the display"""
         if streaming and self.current_streaming_message:
@@ -66,27 +427,18 @@ class ChatDisplay(QTextBrowser):
     
     def append_message(self, role: str, content: str, streaming: bool):
         """Append a new message"""
-        cursor = self.textCursor()
+        cursor = QTextCursor(self.document())
         cursor.movePosition(QTextCursor.End)
+        # One undo step and one layout pass for the whole message
+        cursor.beginEditBlock()
         
-        # Add spacing between messages
-        if self.messages:
-            cursor.insertBlock()
-            cursor.insertBlock()
-        
-        # Insert role header
-        role_format = QTextCharFormat()
-        role_format.setFontWeight(QFont.Bold)
-        role_format.setFontPointSize(11)
-        
+        # Spacing, role header and the message's first block in one insert;
+        # insertText turns each '\n' into a block break
+        spacing = "\n\n" if self.messages else ""
         if role == "user":
-            role_format.setForeground(QColor("#0066cc"))
-            cursor.insertText("👤 You", role_format)
+            cursor.insertText(f"{spacing}👤 You\n", self._fmt_role_user)
         else:
-            role_format.setForeground(QColor("#000000"))  # Black for assistant
-            cursor.insertText("🤖 Assistant", role_format)
-        
-        cursor.insertBlock()
+            cursor.insertText(f"{spacing}🤖 Assistant\n", self._fmt_role_assistant)
         
         # Store message info
         message_info = {
@@ -95,312 +447,425 @@ class ChatDisplay(QTextBrowser):
             'start_position': cursor.position(),
             'streaming': streaming
         }
+        # Tracks the message start through later edits, so it is found without
+        # a block walk; text rendered at the start must not push it forward
+        start_cursor = QTextCursor(cursor)
+        start_cursor.setKeepPositionOnInsert(True)
+        message_info['start_cursor'] = start_cursor
+        
+        self.messages.append(message_info)
+        self._live_messages.append(message_info)
+        if not streaming:
+            self._finalized.append({'role': role, 'content': content})
         
         if streaming:
+            # Streamed text is rendered incrementally from here on
+            message_info.update(content='', rendered_len=0, rendered_offset=0, open_code=None)
+            # Ids of the code blocks not yet committed (the open block, then the
+            # tail's), reused on every flush and taken over once committed
+            message_info['code_ids'] = []
             self.current_streaming_message = message_info
-        
-        self.messages.append(message_info)
+            cursor.endEditBlock()
+            self.render_streaming_content(content)
+            self.archive_old_messages()
+            return
         
         # Render content
-        self.render_content(content, cursor.position())
+        self.render_content(content, cursor)
+        cursor.endEditBlock()
+        self.archive_old_messages()
         
         # Scroll to bottom
         self.ensureCursorVisible()
     
+    def set_throttle_interval(self, ms: int):
+        """Set how often queued streaming updates are rendered"""
+        self._flush_interval_ms = max(0, int(ms))
+    
     def update_streaming_message(self, new_content: str):
-        """Update the current streaming message"""
+        """Queue new content for the current streaming message"""
         if not self.current_streaming_message:
             return
         
-        # Get the position range to replace
-        start_pos = self.current_streaming_message['start_position']
+        self._pending_content = new_content
+        if not self._flush_timer.isActive():
+            self._flush_timer.start(self._flush_interval_ms)
+    
+    def _flush_streaming(self):
+        """Render the most recent queued streaming content"""
+        content, self._pending_content = self._pending_content, None
+        if content is not None:
+            with self._updates_paused():
+                self.render_streaming_content(content)
+    
+    @contextlib.contextmanager
+    def _updates_paused(self):
+        """Hold repaints for a batch of inserts; nested uses leave it to the outermost"""
+        if not self.updatesEnabled():
+            yield
+            return
+        self.setUpdatesEnabled(False)
+        try:
+            yield
+        finally:
+            self.setUpdatesEnabled(True)
+            self.viewport().update()
+    
+    def render_streaming_content(self, new_content: str, final: bool = False):
+        """Render the current streaming message
+        
+        Complete lines outside an open code fence are rendered once and kept;
+        only the unfinished tail is removed and re-rendered on each update.
+        With `final`, the whole remainder is committed.
+        """
+        message = self.current_streaming_message
+        if not message:
+            return
+        
+        old_content = message['content']
+        if (len(new_content) > len(old_content) and new_content.startswith(old_content)
+                and new_content[len(old_content):].isspace()):
+            # Whitespace-only delta changes nothing visible yet; the next
+            # update re-renders the tail from the recorded content
+            message['content'] = new_content
+            return
         
-        cursor = self.textCursor()
-        cursor.setPosition(start_pos)
+        rendered_len = message['rendered_len']
+        # Plain appends (the normal streaming case) skip the slice comparison
+        if (not new_content.startswith(old_content)
+                and new_content[:rendered_len] != old_content[:rendered_len]):
+            # Already-rendered text changed: start over from the message start
+            rendered_len = message['rendered_len'] = 0
+            message['rendered_offset'] = 0
+            message['open_code'] = None
+        
+        # Remove the previously rendered tail
+        start_pos = message['start_cursor'].position()
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(start_pos + message['rendered_offset'])
         cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
-        
-        # Remove old content
         cursor.removeSelectedText()
         
         # Update message info
-        self.current_streaming_message['content'] = new_content
+        message['content'] = new_content
+        
+        if message['open_code'] is not None:
+            if self.extend_open_code_block(message, cursor, start_pos, final):
+                # Still open: only rows for the new lines were added
+                cursor.endEditBlock()
+                self.ensureCursorVisible()
+                return
+            rendered_len = message['rendered_len']
+        
+        # Render newly completed lines and keep them
+        boundary = len(new_content) if final else self._stable_stream_boundary(new_content, rendered_len)
+        if boundary > rendered_len:
+            self.render_with_code_blocks(new_content[rendered_len:boundary], cursor,
+                                         code_ids=message['code_ids'])
+            message['rendered_len'] = boundary
+            message['rendered_offset'] = cursor.position() - start_pos
+        
+        if not final and self.open_code_block(message, cursor, start_pos, boundary):
+            cursor.endEditBlock()
+            self.ensureCursorVisible()
+            return
         
-        # Render new content
-        self.render_content(new_content, start_pos)
+        # Render the unfinished tail; it is redrawn on every flush, so its
+        # code blocks are not highlighted until they are committed above
+        message['code_ids'] = self.render_with_code_blocks(
+            new_content[boundary:], cursor, plain_code=True, code_ids=message['code_ids']
+        )
+        cursor.endEditBlock()
         
         # Scroll to bottom
         self.ensureCursorVisible()
     
+    def open_code_block(self, message: dict, cursor: QTextCursor, start_pos: int, boundary: int) -> bool:
+        """Start a live table for a code fence that is open past `boundary`
+        
+        Returns False when there is no open fence or its language line is
+        still incomplete; the caller then renders the tail as usual.
+        """
+        content = message['content']
+        if content.count('```', boundary) % 2 == 0:
+            return False
+        fence = content.rfind('```', boundary)
+        header_end = content.find('\n', fence)
+        if header_end == -1:
+            return False
+        
+        # Text between the committed prefix and the fence
+        if fence > boundary:
+            self.render_with_code_blocks(content[boundary:fence], cursor, code_ids=message['code_ids'])
+        
+        language = content[fence + 3:header_end].strip()
+        display_language = _DISPLAY_LANGUAGES.get(language.lower(), language)
+        container_offset = cursor.position() - start_pos
+        cursor.insertBlock()
+        cursor.insertHtml(
+            '<div style="border-top:1px solid #d0d0d0;padding:8px 12px;background:#f5f5f5;">'
+            '<span style="color:#0969da;font-size:13px;font-weight:600;">%s</span></div>'
+            % display_language.translate(_HTML_ESCAPE)
+        )
+        cursor.insertBlock()
+        table = cursor.insertTable(1, 2, self._open_code_table_format)
+        
+        message['open_code'] = {
+            'fence': fence,
+            'family': _LANGUAGE_FAMILIES.get(language.lower()),
+            'table': table,
+            'rows': 0,
+            'offset': container_offset,
+        }
+        message['rendered_len'] = header_end + 1
+        self.append_open_code_rows(message, start_pos)
+        return True
+    
+    def extend_open_code_block(self, message: dict, cursor: QTextCursor, start_pos: int, final: bool) -> bool:
+        """Add rows for new lines of the open code block
+        
+        Once the closing fence arrives (or the stream ends) the live table is
+        replaced by a normally rendered block and False is returned.
+        """
+        content = message['content']
+        open_code = message['open_code']
+        close = content.find('```', message['rendered_len'])
+        if close == -1 and not final:
+            self.append_open_code_rows(message, start_pos)
+            return True
+        
+        # Swap the live table for the full rendering (indentation pass, copy link)
+        cursor.setPosition(start_pos + open_code['offset'])
+        cursor.movePosition(QTextCursor.End, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        end = close + 3 if close != -1 else len(content)
+        self.render_with_code_blocks(content[open_code['fence']:end], cursor, code_ids=message['code_ids'])
+        message['open_code'] = None
+        message['rendered_len'] = end
+        message['rendered_offset'] = cursor.position() - start_pos
+        return False
+    
+    def append_open_code_rows(self, message: dict, start_pos: int):
+        """Highlight the newly completed lines of the open code block into its table"""
+        content = message['content']
+        open_code = message['open_code']
+        start = message['rendered_len']
+        last_nl = content.rfind('\n', start)
+        if last_nl != -1:
+            table = open_code['table']
+            family = open_code['family']
+            for line in content[start:last_nl].split('\n'):
+                row = open_code['rows']
+                if row >= table.rows():
+                    table.appendRows(1)
+                table.cellAt(row, 0).firstCursorPosition().insertText(str(row + 1), self._fmt_line_number)
+                table.cellAt(row, 1).firstCursorPosition().insertHtml(
+                    _CODE_PRE_OPEN + self.simple_syntax_highlight(line, family) + _CODE_PRE_CLOSE
+                )
+                open_code['rows'] = row + 1
+            message['rendered_len'] = last_nl + 1
+        # Anything after the table is the re-rendered tail
+        message['rendered_offset'] = open_code['table'].lastPosition() + 1 - start_pos
+    
+    def archive_old_messages(self):
+        """Collapse the oldest rendered messages beyond MAX_LIVE_MESSAGES"""
+        while len(self._live_messages) > MAX_LIVE_MESSAGES:
+            message = self._live_messages[0]
+            if message['streaming']:
+                break
+            self._live_messages.popleft()
+            
+            # Content runs up to the spacing blocks before the next role header
+            next_start = self._live_messages[0]['start_cursor']
+            end_pos = next_start.block().previous().previous().position() - 1
+            
+            cursor = QTextCursor(self.document())
+            cursor.beginEditBlock()
+            cursor.setPosition(message['start_cursor'].position())
+            cursor.setPosition(end_pos, QTextCursor.KeepAnchor)
+            # Keep the rendered form so expanding it again needs no re-render
+            self.cache_rendered(message['content'], cursor.selection())
+            cursor.removeSelectedText()
+            cursor.insertText("[earlier message — scroll up to expand]", self._fmt_placeholder)
+            cursor.endEditBlock()
+            self._archived_messages.append(message)
+        self.trim_oldest_messages()
+    
+    def trim_oldest_messages(self):
+        """Remove the oldest collapsed messages from the document past MAX_MESSAGES"""
+        excess = len(self._archived_messages) + len(self._live_messages) - MAX_MESSAGES
+        excess = min(excess, len(self._archived_messages))
+        if excess <= 0:
+            return
+        # Collapsed messages are oldest first and sit at the top of the document
+        del self._archived_messages[:excess]
+        first = self._archived_messages[0] if self._archived_messages else self._live_messages[0]
+        
+        # One cut from the top up to the first kept message's role header
+        cursor = QTextCursor(self.document())
+        cursor.setPosition(first['start_cursor'].block().previous().position(), QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+    
+    def cache_rendered(self, content: str, fragment):
+        """Remember the rendered fragment for a message's content"""
+        self._rendered_cache[content] = fragment
+        self._rendered_cache.move_to_end(content)
+        if len(self._rendered_cache) > RENDERED_CACHE_SIZE:
+            self._rendered_cache.popitem(last=False)
+    
+    def _on_scroll(self, value: int):
+        """Re-render collapsed messages as the view nears the top"""
+        if self._expanding or not self._archived_messages:
+            return
+        scrollbar = self.verticalScrollBar()
+        self._expanding = True
+        try:
+            while self._archived_messages and scrollbar.value() <= scrollbar.pageStep() // 4:
+                old_max = scrollbar.maximum()
+                self.expand_message(self._archived_messages.pop())
+                # Keep the visible text in place as content grows above it
+                scrollbar.setValue(scrollbar.value() + scrollbar.maximum() - old_max)
+        finally:
+            self._expanding = False
+    
+    def expand_message(self, message: dict):
+        """Replace a message's placeholder line with its rendered content"""
+        cursor = QTextCursor(self.document())
+        cursor.beginEditBlock()
+        cursor.setPosition(message['start_cursor'].position())
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.removeSelectedText()
+        self.render_content(message['content'], cursor)
+        cursor.endEditBlock()
+        self._live_messages.appendleft(message)
+    
+    @staticmethod
+    def _stable_stream_boundary(content: str, rendered_len: int) -> int:
+        """Offset of the last newline that is not inside an unclosed code fence"""
+        boundary = content.rfind('\n')
+        # The rendered prefix always holds whole fence pairs, so only the
+        # new text decides whether a fence is still open
+        while boundary > rendered_len and content.count('```', rendered_len, boundary) % 2:
+            # Back off to the line before the open fence
+            fence = content.rfind('```', 0, boundary)
+            boundary = content.rfind('\n', 0, fence)
+        return max(boundary, rendered_len)
+    
     def finish_streaming(self):
         """Mark streaming as finished"""
-        if self.current_streaming_message:
-            self.current_streaming_message['streaming'] = False
+        # Render whatever is still queued before the message is finalized
+        self._flush_timer.stop()
+        self._flush_streaming()
+        
+        message = self.current_streaming_message
+        if message:
+            if message['open_code'] is not None or '```' in message['content'][message['rendered_len']:]:
+                # Code blocks in the tail were shown plain; highlight them now
+                self.render_streaming_content(message['content'], final=True)
+            message['streaming'] = False
+            self._finalized.append({'role': message['role'], 'content': message['content']})
             self.current_streaming_message = None
     
-    def render_content(self, content: str, start_position: int):
-        """Render content with markdown support"""
-        cursor = self.textCursor()
+    def render_content(self, content: str, cursor: QTextCursor):
+        """Render content with markdown support at the cursor position"""
+        if not content or content.isspace():
+            # Nothing to parse
+            cursor.insertText(content, self._fmt_text)
+            return
         
-        # Ensure cursor is at the correct position
-        if start_position > self.document().characterCount():
-            start_position = self.document().characterCount() - 1
+        # No inline markers and no header/list lead-in: plain text, one insert
+        if '`' not in content and '*' not in content:
+            first = content.lstrip()[0]
+            if first not in '#+-' and not first.isdigit():
+                cursor.insertText(content, self._fmt_text)
+                return
         
-        cursor.setPosition(max(0, start_position))
+        # Previously rendered content is copied back in as-is
+        fragment = self._rendered_cache.get(content)
+        if fragment is not None:
+            self._rendered_cache.move_to_end(content)
+            cursor.insertFragment(fragment)
+            return
         
         # Check if content contains code blocks
-        if '```' in content:
-            self.render_with_code_blocks(content, cursor)
-        else:
-            # Simple rendering for non-code content
-            self.render_simple_markdown(content, cursor)
-    
-    def render_with_code_blocks(self, content: str, cursor: QTextCursor):
-        """Render content with proper code block handling"""
-        parts = re.split(r'(```[\s\S]*?```)', content)
-        
-        for part in parts:
-            if part.startswith('```') and part.endswith('```'):
-                # Code block
-                self.render_code_block(part, cursor)
+        with self._updates_paused():
+            if '```' in content:
+                self.render_with_code_blocks(content, cursor)
             else:
-                # Regular content - process line by line for headers
-                if part.strip():
-                    lines = part.split('\n')
-                    for i, line in enumerate(lines):
-                        if line or i < len(lines) - 1:  # Process non-empty lines or add line breaks
-                            if i > 0:
-                                cursor.insertBlock()
-                            if line.strip():
-                                self.render_simple_markdown(line, cursor)
+                # Simple rendering for non-code content
+                self.render_simple_markdown(content, cursor)
     
-    def filter_code_content(self, lines: list, language: str) -> str:
-        """Filter out non-code content and auto-correct indentation"""
-        code_lines = []
-        in_docstring = False
-        docstring_quotes = None
-        min_indent = float('inf')  # Track minimum indentation
-        
-        # First pass: collect code lines and find minimum indentation
-        temp_lines = []
-        for line in lines:
-            # Check if line contains Korean
-            has_korean = any('\uac00' <= char <= '\ud7a3' for char in line)
-            
-            # Handle docstrings for Python
-            if language.lower() in ['python', 'py']:
-                if '"""' in line or "'''" in line:
-                    if not in_docstring:
-                        in_docstring = True
-                        docstring_quotes = '"""' if '"""' in line else "'''"
-                        temp_lines.append(line)
-                    elif docstring_quotes in line:
-                        in_docstring = False
-                        docstring_quotes = None
-                        temp_lines.append(line)
-                    else:
-                        temp_lines.append(line)
-                    continue
-                
-                # Inside docstring - keep it
-                if in_docstring:
-                    temp_lines.append(line)
-                    continue
-            
-            # If line has Korean, check if it's a standalone description or part of code
-            if has_korean:
-                stripped = line.strip()
-                
-                # Skip pure Korean description lines
-                if stripped and stripped[0] >= '\uac00' and stripped[0] <= '\ud7a3':
-                    # Check if it looks like a description line
-                    if not any(char in stripped for char in ['=', '(', ')', '[', ']', '{', '}', ';', ':', '<', '>']):
-                        continue  # Skip pure Korean description
-                
-                # Handle comments with Korean
-                if language.lower() in ['python', 'py']:
-                    if '#' in line:
-                        # Keep the code part before the comment
-                        code_part = line.split('#')[0]
-                        if code_part.strip():
-                            temp_lines.append(code_part.rstrip())
-                        # Skip if it's only a Korean comment
-                        continue
-                    # Check if line has code structure
-                    elif any(keyword in line for keyword in ['def ', 'class ', 'import ', 'from ', 'return ', 'if ', 'for ', 'while ', 'print(', '=']):
-                        temp_lines.append(line)
-                    else:
-                        # Likely a Korean description, skip
-                        continue
-                        
-                elif language.lower() in ['javascript', 'js', 'typescript', 'ts', 'java', 'c', 'cpp', 'c++', 'csharp', 'cs', 'c#']:
-                    if '//' in line:
-                        # Keep the code part before the comment
-                        code_part = line.split('//')[0]
-                        if code_part.strip():
-                            temp_lines.append(code_part.rstrip())
-                        continue
-                    # Check for code structure
-                    elif any(keyword in line for keyword in ['{', '}', ';', 'public', 'private', 'class', 'void', 'int', 'string', 'var', 'let', 'const', 'function']):
-                        temp_lines.append(line)
-                    else:
-                        # Skip Korean descriptions
-                        continue
-                else:
-                    # For other languages, be conservative
-                    if any(char in line for char in ['=', '(', ')', '{', '}', '[', ']', ';']):
-                        temp_lines.append(line)
-                    else:
-                        continue
-            else:
-                # No Korean, keep the line as is
-                temp_lines.append(line)
-        
-        # Second pass: find minimum indentation (excluding empty lines)
-        for line in temp_lines:
-            if line.strip():  # Non-empty line
-                # Count leading spaces/tabs
-                indent = 0
-                for char in line:
-                    if char == ' ':
-                        indent += 1
-                    elif char == '\t':
-                        indent += 4  # Consider tab as 4 spaces
-                    else:
-                        break
-                min_indent = min(min_indent, indent)
-        
-        # If no non-empty lines or min_indent is still inf, use 0
-        if min_indent == float('inf'):
-            min_indent = 0
-        
-        # Third pass: normalize indentation
-        for line in temp_lines:
-            if not line.strip():  # Empty line
-                code_lines.append('')
-            else:
-                # Remove minimum indentation from each line
-                spaces_to_remove = min_indent
-                i = 0
-                while i < len(line) and spaces_to_remove > 0:
-                    if line[i] == ' ':
-                        spaces_to_remove -= 1
-                        i += 1
-                    elif line[i] == '\t':
-                        spaces_to_remove -= 4
-                        i += 1
-                    else:
-                        break
-                code_lines.append(line[i:])
-        
-    def auto_indent_code(self, lines: list, language: str) -> list:
-        """Auto-correct indentation based on language syntax"""
-        if not lines:
-            return lines
-        
-        indented_lines = []
-        indent_level = 0
-        indent_size = 4  # Standard indent size
-        
-        # Language-specific indentation rules
-        if language.lower() in ['python', 'py']:
-            # Python: indent after :, dedent for return/break/continue/pass
-            for line in lines:
-                stripped = line.strip()
-                if not stripped:
-                    indented_lines.append('')
-                    continue
-                
-                # Check for dedent keywords first
-                if stripped.startswith(('return', 'break', 'continue', 'pass')):
-                    indented_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    if indent_level > 0 and not stripped.endswith(':'):
-                        indent_level -= 1
-                elif stripped.startswith(('elif', 'else', 'except', 'finally')):
-                    if indent_level > 0:
-                        indent_level -= 1
-                    indented_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    if stripped.endswith(':'):
-                        indent_level += 1
-                else:
-                    indented_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    # Check if line ends with : (new block)
-                    if stripped.endswith(':'):
-                        indent_level += 1
-                    
-        elif language.lower() in ['csharp', 'cs', 'c#', 'java', 'cpp', 'c++', 'c', 'javascript', 'js', 'typescript', 'ts']:
-            # C-style languages: track { and }
-            for line in lines:
-                stripped = line.strip()
-                if not stripped:
-                    indented_lines.append('')
-                    continue
-                
-                # Check for closing brace first
-                if stripped.startswith('}'):
-                    if indent_level > 0:
-                        indent_level -= 1
-                    indented_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    # Check if there's an opening brace on the same line
-                    if '{' in stripped:
-                        indent_level += 1
-                else:
-                    # Normal line
-                    indented_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    
-                    # Count braces
-                    open_braces = stripped.count('{')
-                    close_braces = stripped.count('}')
-                    indent_level += (open_braces - close_braces)
-                    
-                    # Ensure indent_level doesn't go negative
-                    if indent_level < 0:
-                        indent_level = 0
-        else:
-            # For other languages, just normalize existing indentation
-            return self.normalize_indentation(lines)
+    def render_with_code_blocks(self, content: str, cursor: QTextCursor, plain_code: bool = False,
+                                code_ids: list = None) -> list:
+        """Render content with proper code block handling
+        
+        Code blocks take their ids from the front of `code_ids` (removing
+        them) before new ones are allocated. Returns the ids used, in order.
+        """
+        used_ids = []
+        pos = 0
+        for match in _CODE_BLOCK_RE.finditer(content):
+            if match.start() > pos:
+                self.render_markdown_lines(content[pos:match.start()], cursor)
+            block_id = code_ids.pop(0) if code_ids else None
+            used_ids.append(self.render_code_block(match.group(), cursor, plain_code, block_id))
+            pos = match.end()
+        
+        if pos < len(content):
+            self.render_markdown_lines(content[pos:], cursor)
+        return used_ids
+    
+    def render_markdown_lines(self, text: str, cursor: QTextCursor):
+        """Render regular content line by line so headers and lists are recognized"""
+        if not text.strip():
+            return
         
-        return indented_lines
+        lines = text.split('\n')
+        for i, line in enumerate(lines):
+            if line or i < len(lines) - 1:  # Process non-empty lines or add line breaks
+                if i > 0:
+                    cursor.insertBlock()
+                if line.strip():
+                    self.render_simple_markdown(line, cursor)
     
     def normalize_indentation(self, lines: list) -> list:
         """Normalize indentation by removing minimum common indentation"""
         if not lines:
             return lines
         
-        # Find minimum indentation
-        min_indent = float('inf')
+        # One scan splits each line into leading whitespace and content and
+        # finds the minimum indentation (tabs count as 4)
+        split_lines = []
+        min_indent = None
         for line in lines:
-            if line.strip():  # Non-empty line
-                indent = 0
-                for char in line:
-                    if char == ' ':
-                        indent += 1
-                    elif char == '\t':
-                        indent += 4
-                    else:
-                        break
-                min_indent = min(min_indent, indent)
-        
-        if min_indent == float('inf'):
-            min_indent = 0
+            content = line.lstrip(' \t')
+            if not content.strip():
+                split_lines.append(None)
+                continue
+            leading = line[:len(line) - len(content)]
+            indent = len(leading) + 3 * leading.count('\t')
+            if min_indent is None or indent < min_indent:
+                min_indent = indent
+            split_lines.append((leading, content))
         
         # Remove minimum indentation
         normalized_lines = []
-        for line in lines:
-            if not line.strip():
+        for parts in split_lines:
+            if parts is None:
                 normalized_lines.append('')
-            else:
-                spaces_to_remove = min_indent
-                i = 0
-                while i < len(line) and spaces_to_remove > 0:
-                    if line[i] == ' ':
-                        spaces_to_remove -= 1
-                        i += 1
-                    elif line[i] == '\t':
-                        spaces_to_remove -= 4
-                        i += 1
-                    else:
-                        break
-                normalized_lines.append(line[i:])
+                continue
+            leading, content = parts
+            if '\t' not in leading:
+                normalized_lines.append(leading[min_indent:] + content)
+                continue
+            # Tabs may overshoot the budget; drop whole characters like before
+            spaces_to_remove = min_indent
+            i = 0
+            while i < len(leading) and spaces_to_remove > 0:
+                spaces_to_remove -= 4 if leading[i] == '\t' else 1
+                i += 1
+            normalized_lines.append(leading[i:] + content)
         
         return normalized_lines
     
@@ -409,392 +874,221 @@ class ChatDisplay(QTextBrowser):
         if not lines:
             return lines
         
-        corrected_lines = []
-        indent_level = 0
-        indent_size = 4  # Standard indent size
-        
         # Language-specific indentation rules
-        if language.lower() in ['csharp', 'cs', 'c#', 'java', 'cpp', 'c++', 'c', 'javascript', 'js', 'typescript', 'ts']:
-            # C-style languages: track { and }
-            for line in lines:
-                stripped = line.strip()
-                if not stripped:
-                    corrected_lines.append('')
-                    continue
-                
-                # Check for closing brace first
-                if stripped.startswith('}'):
-                    if indent_level > 0:
-                        indent_level -= 1
-                    corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    # Check if there's an opening brace on the same line after the closing brace
-                    if '{' in stripped[1:]:
-                        indent_level += 1
-                else:
-                    # Normal line
-                    corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    
-                    # Count braces
-                    open_braces = stripped.count('{')
-                    close_braces = stripped.count('}')
-                    indent_level += (open_braces - close_braces)
-                    
-                    # Ensure indent_level doesn't go negative
-                    if indent_level < 0:
-                        indent_level = 0
-                        
-        elif language.lower() in ['python', 'py']:
-            # Python: indent after :, dedent for specific keywords
-            for line in lines:
-                stripped = line.strip()
-                if not stripped:
-                    corrected_lines.append('')
-                    continue
-                
-                # Check for dedent keywords first
-                if stripped.startswith(('return', 'break', 'continue', 'pass')):
-                    corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    if indent_level > 0 and not stripped.endswith(':'):
-                        indent_level -= 1
-                elif stripped.startswith(('elif', 'else', 'except', 'finally')):
-                    if indent_level > 0:
-                        indent_level -= 1
-                    corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    if stripped.endswith(':'):
-                        indent_level += 1
-                else:
-                    corrected_lines.append(' ' * (indent_level * indent_size) + stripped)
-                    # Check if line ends with : (new block)
-                    if stripped.endswith(':'):
-                        indent_level += 1
+        family = _LANGUAGE_FAMILIES.get(language.lower())
+        if family in _SLASH_COMMENT_FAMILIES:
+            return _indent_c_style(lines)
+        elif family == 'python':
+            return _indent_python_style(lines)
         else:
             # For other languages, just normalize existing indentation
             return self.normalize_indentation(lines)
-        
-        return corrected_lines
     
-    def render_code_block(self, code_block: str, cursor: QTextCursor):
-        """Render a code block with auto-corrected indentation and line numbers"""
-        lines = code_block.split('\n')
-        
-        # Extract language
-        language = ''
-        if lines[0].startswith('```'):
-            language = lines[0][3:].strip()
-            lines = lines[1:-1] if lines and lines[-1] == '```' else lines[1:]
+    def render_code_block(self, code_block: str, cursor: QTextCursor, plain: bool = False,
+                          block_id: int = None) -> int:
+        """Render a code block with auto-corrected indentation and line numbers
+        
+        With `plain`, or for blocks past the configured size limits, the body
+        is shown as escaped preformatted text instead. A `block_id` from an
+        earlier rendering of the same block is reused; returns the id.
+        """
+        # Slice ```lang\n ... \n``` directly instead of splitting and re-joining
+        first_nl = code_block.find('\n')
+        if first_nl == -1:
+            # Single-line ```code```
+            language = ''
+            body = code_block[3:-3] if code_block.endswith('```') else code_block[3:]
+        else:
+            language = code_block[3:first_nl].strip()
+            end = code_block.rfind('```')
+            body = code_block[first_nl + 1:end] if end > first_nl else code_block[first_nl + 1:]
+            if body.endswith('\n'):
+                body = body[:-1]
         
         # Format language display - Use proper case
-        display_language = language
-        if language.lower() in ['csharp', 'cs']:
-            display_language = 'C#'
-        elif language.lower() == 'cpp':
-            display_language = 'C++'
-        elif language.lower() == 'js':
-            display_language = 'JavaScript'
-        elif language.lower() == 'py':
-            display_language = 'Python'
-        elif language.lower() in ['typescript', 'ts']:
-            display_language = 'TypeScript'
-        elif language.lower() == 'java':
-            display_language = 'Java'
-        elif language.lower() == 'html':
-            display_language = 'HTML'
-        elif language.lower() == 'css':
-            display_language = 'CSS'
-        elif language.lower() == 'sql':
-            display_language = 'SQL'
-        elif language.lower() == 'json':
-            display_language = 'JSON'
-        elif language.lower() == 'xml':
-            display_language = 'XML'
-        elif language.lower() == 'yaml':
-            display_language = 'YAML'
-        elif language.lower() == 'bash':
-            display_language = 'Bash'
-        elif language.lower() == 'shell':
-            display_language = 'Shell'
-        elif language.lower() == 'go':
-            display_language = 'Go'
-        elif language.lower() == 'rust':
-            display_language = 'Rust'
-        elif language.lower() == 'ruby':
-            display_language = 'Ruby'
-        elif language.lower() == 'php':
-            display_language = 'PHP'
-        elif language.lower() == 'swift':
-            display_language = 'Swift'
-        elif language.lower() == 'kotlin':
-            display_language = 'Kotlin'
-        elif language.lower() == 'r':
-            display_language = 'R'
-        
-        # Auto-correct indentation for the code
-        corrected_lines = self.auto_correct_indentation(lines, language)
-        code_content = '\n'.join(corrected_lines)
+        display_language = _DISPLAY_LANGUAGES.get(language.lower(), language)
         
         # Store code block for later copying
-        if not hasattr(self, 'code_blocks'):
-            self.code_blocks = []
-        code_block_index = len(self.code_blocks)
-        self.code_blocks.append(code_content)
+        # Ids keep increasing so copy links stay valid after old blocks are dropped
+        code_block_index = block_id
+        if code_block_index is None:
+            code_block_index = self._next_code_block_id
+            self._next_code_block_id += 1
+        
+        line_count = body.count('\n') + 1
+        pending = False
+        if plain or line_count > self._plain_code_max_lines or len(body) > self._plain_code_max_chars:
+            # No indentation pass, tokenizing or per-line rows
+            code_content = body
+            body_html = _CODE_PRE_OPEN + body.translate(_HTML_ESCAPE) + _CODE_PRE_CLOSE
+        elif line_count >= ASYNC_HIGHLIGHT_MIN_LINES and self.current_streaming_message is None:
+            # Show the raw lines now and swap in the highlighted rows when ready.
+            # Not while streaming: the swap changes the block's length, which
+            # would invalidate the streaming message's rendered offset
+            code_content = body
+            num_width = max(4, len(str(line_count)))
+            row_template = _CODE_ROW_TEMPLATE.replace('{cell_width}', str(10 + num_width * 7))
+            rows_html = ''.join([
+                row_template % (str(i).rjust(num_width), line.translate(_HTML_ESCAPE))
+                for i, line in enumerate(body.split('\n'), 1)
+            ])
+            body_html = _CODE_TABLE_OPEN + rows_html + _CODE_TABLE_CLOSE
+            pending = True
+        else:
+            # Re-rendered blocks (streaming flushes, repeated answers) hit the cache
+            code_content, rows_html = self._code_block_rows(body, language)
+            body_html = _CODE_TABLE_OPEN + rows_html + _CODE_TABLE_CLOSE
+        
+        # A reused id moves to the end, so eviction still drops the oldest
+        self.code_blocks.pop(code_block_index, None)
+        self.code_blocks[code_block_index] = code_content
+        if len(self.code_blocks) > MAX_CODE_BLOCKS:
+            del self.code_blocks[next(iter(self.code_blocks))]
         
         # Insert a block for spacing
         cursor.insertBlock()
         
         # Create simple code block with lines and language label
-        container_start = f'''
-        <div style="margin:10px 0;font-family:'Cascadia Code','Fira Code',Monaco,monospace;">
-            <div style="border-top:1px solid #d0d0d0;padding:8px 12px;display:flex;justify-content:space-between;align-items:center;background:#f5f5f5;">
-                <span style="color:#0969da;font-size:13px;font-weight:600;font-family:'Segoe UI',system-ui,-apple-system,sans-serif;">{display_language}</span>
-                <a href="copy:{code_block_index}" id="copy-btn-{code_block_index}" style="background:#ffffff;color:#24292f;text-decoration:none;font-size:13px;padding:5px 12px;border-radius:6px;border:1px solid #d1d9e0;font-weight:500;display:inline-flex;align-items:center;gap:6px;font-family:'Segoe UI',system-ui,-apple-system,sans-serif;transition:all 0.2s;">Copy</a>
-            </div>
-            <div style="background:#f8f8f8;padding:12px;overflow-x:auto;">
-                <table style="width:100%;border-collapse:collapse;">
-        '''
+        container_start = _CODE_BLOCK_HEADER % (display_language, code_block_index, code_block_index)
+        
+        html = container_start + body_html + _CODE_BLOCK_CLOSE
+        
+        # One insert lets Qt parse and lay out the whole block at once; hold
+        # repaints until it is in place
+        start_pos = cursor.position()
+        with self._updates_paused():
+            cursor.insertHtml(html)
+        end_pos = cursor.position()
+        
+        # Insert spacing after code block
+        cursor.insertBlock()
+        
+        if pending:
+            # A document cursor follows later edits, and its selection
+            # collapses if the placeholder is removed. It ends before the
+            # spacing block, so text inserted after it does not extend it
+            placeholder = QTextCursor(self.document())
+            placeholder.setPosition(start_pos)
+            placeholder.setPosition(end_pos, QTextCursor.KeepAnchor)
+            self._pending_highlights[code_block_index] = (placeholder, container_start)
+            QThreadPool.globalInstance().start(_HighlightTask(self, code_block_index, body, language))
+        return code_block_index
+    
+    def _apply_highlight(self, index: int, code_content: str, rows_html: str):
+        """Replace a code block placeholder with its highlighted rows"""
+        entry = self._pending_highlights.pop(index, None)
+        if entry is None:
+            return
+        placeholder, container_start = entry
+        if not placeholder.hasSelection():
+            # Placeholder was removed before highlighting finished
+            return
         
-        cursor.insertHtml(container_start)
+        if index in self.code_blocks:
+            self.code_blocks[index] = code_content
+        with self._updates_paused():
+            placeholder.insertHtml(container_start + _CODE_TABLE_OPEN + rows_html + _CODE_TABLE_CLOSE + _CODE_BLOCK_CLOSE)
+    
+    def build_code_block_rows(self, body: str, language: str) -> tuple:
+        """Return (corrected code, numbered and highlighted table rows) for a code body
+        
+        Depends only on its arguments; cached per widget as _code_block_rows.
+        """
+        # Auto-correct indentation for the code
+        corrected_lines = self.auto_correct_indentation(body.split('\n'), language)
+        code_content = '\n'.join(corrected_lines)
+        
+        # Highlighter family, resolved once for the whole block
+        family = _LANGUAGE_FAMILIES.get(language.lower())
         
         # Process each line with line numbers
-        code_lines = code_content.split('\n')
+        code_lines = corrected_lines or ['']
         
         # Calculate max line number width for consistent padding
         max_line_num = len(code_lines)
         num_width = max(4, len(str(max_line_num)))  # Minimum 4 digits
         
-        for i, line in enumerate(code_lines, 1):
-            # Apply syntax highlighting
-            highlighted = self.simple_syntax_highlight(line, language)
-            
-            # Format line number with consistent padding
-            line_number = str(i).rjust(num_width)
-            
-            # Create line with improved alignment using monospace font for numbers
-            line_html = f'''
-                <tr>
-                    <td style="width:{10 + num_width * 7}px;text-align:right;color:#999;font-size:12px;font-family:'Consolas','Courier New',monospace;user-select:none;padding:0 8px;border-right:1px solid #e0e0e0;vertical-align:top;white-space:pre;">{line_number}</td>
-                    <td style="padding-left:12px;font-size:13px;color:#333;white-space:pre;font-family:inherit;">{highlighted}</td>
-                </tr>
-            '''
-            cursor.insertHtml(line_html)
-        
-        # Close with bottom line
-        cursor.insertHtml('</table></div><div style="border-bottom:1px solid #d0d0d0;margin-top:8px;"></div></div>')
+        # Row markup only varies by line number and highlighted code
+        row_template = _CODE_ROW_TEMPLATE.replace('{cell_width}', str(10 + num_width * 7))
+        rows = [None] * max_line_num
+        for i, line in enumerate(code_lines):
+            rows[i] = row_template % (str(i + 1).rjust(num_width), self.simple_syntax_highlight(line, family))
         
-        # Insert spacing after code block
-        cursor.insertBlock()
+        return code_content, ''.join(rows)
     
-    def simple_syntax_highlight(self, text: str, language: str) -> str:
-        """Simple syntax highlighting with light theme colors"""
+    def simple_syntax_highlight(self, text: str, family: str) -> str:
+        """Simple syntax highlighting with light theme colors
+        
+        `family` is a value from _LANGUAGE_FAMILIES, or None for plain text.
+        """
         if not text:
             return ''
         
         # Preserve leading whitespace
-        leading_ws = ''
-        i = 0
-        while i < len(text) and text[i] in ' \t':
-            leading_ws += text[i]  # Keep spaces and tabs as-is
-            i += 1
-        
-        # Get the code part after indentation
-        code_part = text[i:]
+        code_part = text.lstrip(' \t')
+        leading_ws = text[:len(text) - len(code_part)]  # Keep spaces and tabs as-is
         
         if not code_part:
             return leading_ws
         
-        # Check for comments first
-        if language.lower() in ['python', 'py'] and code_part.strip().startswith('#'):
-            return leading_ws + f'<span style="color:#008000;">{self.escape_html(code_part)}</span>'
-        elif language.lower() in ['csharp', 'cs', 'c#', 'java', 'js', 'javascript', 'typescript', 'ts', 'cpp', 'c++', 'c']:
-            if code_part.strip().startswith('//'):
-                return leading_ws + f'<span style="color:#008000;">{self.escape_html(code_part)}</span>'
-        
-        # Process the code part
-        result = ''
-        j = 0
-        while j < len(code_part):
-            # Check for strings
-            if code_part[j] in '"\'':
-                quote = code_part[j]
-                k = j + 1
-                while k < len(code_part):
-                    if code_part[k] == '\\':
-                        k += 2
-                    elif code_part[k] == quote:
-                        k += 1
-                        break
-                    else:
-                        k += 1
-                string_part = code_part[j:k]
-                result += f'<span style="color:#a31515;">{self.escape_html(string_part)}</span>'
-                j = k
-            # Check for numbers
-            elif code_part[j].isdigit():
-                k = j
-                while k < len(code_part) and (code_part[k].isdigit() or code_part[k] in '.xXbBoO'):
-                    k += 1
-                num_part = code_part[j:k]
-                result += f'<span style="color:#098658;">{self.escape_html(num_part)}</span>'
-                j = k
-            # Check for words (keywords, identifiers)
-            elif code_part[j].isalpha() or code_part[j] == '_':
-                k = j
-                while k < len(code_part) and (code_part[k].isalnum() or code_part[k] == '_'):
-                    k += 1
-                word = code_part[j:k]
-                
-                # Check if it's a keyword
-                is_keyword = False
-                if language.lower() in ['csharp', 'cs', 'c#']:
-                    keywords = ['using', 'namespace', 'public', 'private', 'protected', 'internal',
-                               'class', 'struct', 'interface', 'enum', 'static', 'void', 'int', 
-                               'string', 'bool', 'double', 'float', 'if', 'else', 'for', 'foreach',
-                               'while', 'return', 'new', 'this', 'var', 'const', 'readonly']
-                    types = ['int', 'string', 'bool', 'double', 'float', 'void', 'var']
-                    if word in keywords:
-                        result += f'<span style="color:#0000ff;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                    elif word in types:
-                        result += f'<span style="color:#2b91af;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                elif language.lower() in ['python', 'py']:
-                    keywords = ['def', 'class', 'if', 'elif', 'else', 'for', 'while', 'return',
-                               'import', 'from', 'as', 'try', 'except', 'finally', 'with', 'lambda',
-                               'pass', 'break', 'continue', 'global', 'nonlocal', 'assert', 'yield']
-                    builtins = ['True', 'False', 'None', 'print', 'len', 'range', 'int', 'str', 'list']
-                    if word in keywords:
-                        result += f'<span style="color:#0000ff;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                    elif word in builtins:
-                        result += f'<span style="color:#2b91af;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                elif language.lower() in ['javascript', 'js', 'typescript', 'ts']:
-                    keywords = ['function', 'const', 'let', 'var', 'if', 'else', 'for', 'while', 'return',
-                               'class', 'extends', 'new', 'this', 'import', 'export', 'from', 'as',
-                               'async', 'await', 'try', 'catch', 'finally', 'throw', 'typeof', 'instanceof']
-                    types = ['string', 'number', 'boolean', 'any', 'void', 'interface', 'type', 'enum']
-                    if word in keywords:
-                        result += f'<span style="color:#0000ff;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                    elif word in types and language.lower() in ['typescript', 'ts']:
-                        result += f'<span style="color:#2b91af;">{self.escape_html(word)}</span>'
-                        is_keyword = True
-                
-                if not is_keyword:
-                    # Check if it's a function/method call (followed by parenthesis)
-                    if k < len(code_part) and code_part[k] == '(':
-                        result += f'<span style="color:#795e26;">{self.escape_html(word)}</span>'
-                    else:
-                        result += f'<span style="color:#000000;">{self.escape_html(word)}</span>'
-                j = k
-            # Handle operators and other characters
-            else:
-                if code_part[j] in '()[]{}' :
-                    result += f'<span style="color:#000000;">{self.escape_html(code_part[j])}</span>'
-                elif code_part[j] in '+-*/%=<>!&|^~':
-                    result += f'<span style="color:#000000;">{self.escape_html(code_part[j])}</span>'
-                else:
-                    result += f'<span style="color:#000000;">{self.escape_html(code_part[j])}</span>'
-                j += 1
-        
-        return leading_ws + result
+        return leading_ws + _highlight_code_part(code_part, family)
     
     def highlight_python_line(self, cursor: QTextCursor, line: str):
         """Apply Python syntax highlighting to a line"""
-        # Define formats
-        keyword_format = QTextCharFormat()
-        keyword_format.setFontFamily("Consolas, Monaco, monospace")
-        keyword_format.setFontPointSize(9)
-        keyword_format.setForeground(QColor("#cf222e"))  # Red for keywords
-        keyword_format.setFontWeight(QFont.Bold)
-        
-        string_format = QTextCharFormat()
-        string_format.setFontFamily("Consolas, Monaco, monospace")
-        string_format.setFontPointSize(9)
-        string_format.setForeground(QColor("#0a3069"))  # Blue for strings
-        
-        comment_format = QTextCharFormat()
-        comment_format.setFontFamily("Consolas, Monaco, monospace")
-        comment_format.setFontPointSize(9)
-        comment_format.setForeground(QColor("#6e7781"))  # Gray for comments
-        comment_format.setFontItalic(True)
-        
-        function_format = QTextCharFormat()
-        function_format.setFontFamily("Consolas, Monaco, monospace")
-        function_format.setFontPointSize(9)
-        function_format.setForeground(QColor("#8250df"))  # Purple for functions
-        
-        default_format = QTextCharFormat()
-        default_format.setFontFamily("Consolas, Monaco, monospace")
-        default_format.setFontPointSize(9)
-        default_format.setForeground(QColor("#24292e"))
-        
-        # Python keywords
-        keywords = [
-            'def', 'class', 'if', 'elif', 'else', 'for', 'while', 'return',
-            'import', 'from', 'as', 'try', 'except', 'finally', 'with',
-            'lambda', 'pass', 'break', 'continue', 'global', 'nonlocal',
-            'assert', 'yield', 'raise', 'del', 'in', 'is', 'not', 'and', 'or',
-            'True', 'False', 'None'
-        ]
-        
         # Check for comment
         if '#' in line:
             comment_pos = line.index('#')
             # Insert pre-comment part
-            self.highlight_python_tokens(cursor, line[:comment_pos], keywords, 
-                                        keyword_format, string_format, function_format, default_format)
+            self.highlight_python_tokens(cursor, line[:comment_pos], _PY_KEYWORDS)
             # Insert comment
-            cursor.insertText(line[comment_pos:], comment_format)
+            cursor.insertText(line[comment_pos:], self._fmt_py_comment)
         else:
             # Process the entire line
-            self.highlight_python_tokens(cursor, line, keywords, 
-                                        keyword_format, string_format, function_format, default_format)
+            self.highlight_python_tokens(cursor, line, _PY_KEYWORDS)
     
-    def highlight_python_tokens(self, cursor, text, keywords, keyword_format, 
-                               string_format, function_format, default_format):
+    def highlight_python_tokens(self, cursor, text, keywords):
         """Tokenize and highlight Python code"""
-        # Simple tokenization using regex
-        import re
-        
-        # Pattern to match strings, keywords, functions, and other tokens
-        pattern = r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"[^"]*"|\'[^\']*\'|\b\w+\b|[^\w\s]+|\s+)'
-        tokens = re.findall(pattern, text)
+        # Strings, words, operator runs and whitespace
+        tokens = _PY_TOKEN_RE.findall(text)
         
+        # Consecutive tokens with the same format go out in one insertText
+        run = []
+        run_fmt = None
+        prev_word = ''  # Previous non-whitespace token
         for token in tokens:
             if not token:
                 continue
             
             # Check for strings
-            if (token.startswith('"') and token.endswith('"')) or \
-               (token.startswith("'") and token.endswith("'")):
-                cursor.insertText(token, string_format)
+            first = token[0]
+            if (first == '"' or first == "'") and token[-1] == first:
+                fmt = self._fmt_py_string
             # Check for keywords
             elif token in keywords:
-                cursor.insertText(token, keyword_format)
-            # Check for function definitions (simple heuristic)
-            elif token == 'def' or (len(tokens) > tokens.index(token) + 1 and 
-                                   tokens[tokens.index(token) - 1] == 'def'):
-                cursor.insertText(token, function_format)
+                fmt = self._fmt_py_keyword
+            # Name after 'def' (simple heuristic)
+            elif prev_word == 'def':
+                fmt = self._fmt_py_function
             # Default
             else:
-                cursor.insertText(token, default_format)
+                fmt = self._fmt_code_default
+            
+            if fmt is not run_fmt:
+                if run:
+                    cursor.insertText(''.join(run), run_fmt)
+                    run.clear()
+                run_fmt = fmt
+            run.append(token)
+            if not token.isspace():
+                prev_word = token
+        
+        if run:
+            cursor.insertText(''.join(run), run_fmt)
     
     def highlight_javascript_line(self, cursor: QTextCursor, line: str):
         """Apply JavaScript syntax highlighting to a line"""
-        # Similar to Python but with JS keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setFontFamily("Consolas, Monaco, monospace")
-        keyword_format.setFontPointSize(9)
-        keyword_format.setForeground(QColor("#cf222e"))
-        keyword_format.setFontWeight(QFont.Bold)
-        
-        default_format = QTextCharFormat()
-        default_format.setFontFamily("Consolas, Monaco, monospace")
-        default_format.setFontPointSize(9)
-        default_format.setForeground(QColor("#24292e"))
-        
         # For now, just insert with default format
-        cursor.insertText(line, default_format)
+        cursor.insertText(line, self._fmt_code_default)
     
     def render_simple_markdown(self, text: str, cursor: QTextCursor):
         """Render simple markdown (headers, lists, bold, italic, inline code)"""
@@ -804,34 +1098,17 @@ class ChatDisplay(QTextBrowser):
         # Check for headers first
         if text.strip().startswith('#'):
             # Count the number of # symbols
-            header_match = re.match(r'^(#{1,6})\s+(.+)', text.strip())
+            header_match = _HEADER_RE.match(text.strip())
             if header_match:
                 level = len(header_match.group(1))
                 header_text = header_match.group(2)
                 
-                # Apply header format
-                header_format = QTextCharFormat()
-                header_format.setForeground(QColor("#000000"))  # Black text
-                header_format.setFontWeight(QFont.Bold)
-                
-                # Set font size based on header level
-                base_size = 10
-                if level == 1:
-                    header_format.setFontPointSize(base_size + 8)  # H1: 18pt
-                elif level == 2:
-                    header_format.setFontPointSize(base_size + 6)  # H2: 16pt
-                elif level == 3:
-                    header_format.setFontPointSize(base_size + 4)  # H3: 14pt
-                elif level == 4:
-                    header_format.setFontPointSize(base_size + 2)  # H4: 12pt
-                else:
-                    header_format.setFontPointSize(base_size + 1)  # H5-H6: 11pt
-                
-                cursor.insertText(header_text, header_format)
+                # Font size based on header level
+                cursor.insertText(header_text, self._fmt_headers[level])
                 return
         
         # Check for list items (bullets)
-        list_match = re.match(r'^(\s*)([*+-])\s+(.+)', text)
+        list_match = _BULLET_RE.match(text)
         if list_match:
             indent = list_match.group(1)
             bullet = list_match.group(2)
@@ -841,19 +1118,15 @@ class ChatDisplay(QTextBrowser):
             indent_level = len(indent) // 4
             indent_text = "    " * indent_level  # 4 spaces per level
             
-            # Create bullet format
-            bullet_format = QTextCharFormat()
-            bullet_format.setForeground(QColor("#000000"))
-            
             # Insert indentation, bullet and space
-            cursor.insertText(indent_text + "• ", bullet_format)  # Use bullet character
+            cursor.insertText(indent_text + "• ", self._fmt_text)  # Use bullet character
             
             # Process the content for bold/italic
             self.render_text_with_formatting(content, cursor)
             return
         
         # Check for numbered list items
-        numbered_match = re.match(r'^(\s*)(\d+)\.\s+(.+)', text)
+        numbered_match = _NUMBERED_RE.match(text)
         if numbered_match:
             indent = numbered_match.group(1)
             number = numbered_match.group(2)
@@ -863,33 +1136,20 @@ class ChatDisplay(QTextBrowser):
             indent_level = len(indent) // 4
             indent_text = "    " * indent_level
             
-            # Create number format
-            number_format = QTextCharFormat()
-            number_format.setForeground(QColor("#000000"))
-            
             # Insert indentation, number and dot
-            cursor.insertText(indent_text + number + ". ", number_format)
+            cursor.insertText(indent_text + number + ". ", self._fmt_text)
             
             # Process the content for bold/italic
             self.render_text_with_formatting(content, cursor)
             return
         
-        # Default text format for assistant messages
-        default_format = QTextCharFormat()
-        default_format.setForeground(QColor("#000000"))  # Black for assistant text
-        
         # Process regular text with bold/italic/code
         self.render_text_with_formatting(text, cursor)
     
     def render_text_with_formatting(self, text: str, cursor: QTextCursor):
         """Render text with bold, italic, and inline code formatting"""
-        import re
-        
-        # Complex pattern to handle all formatting types
         # Matches: `code`, **bold**, *italic*
-        # Priority: inline code > bold > italic
-        pattern = r'(`[^`]+`|\*\*[^*]+\*\*|\*[^*]+\*)'
-        parts = re.split(pattern, text)
+        parts = _INLINE_FORMAT_RE.split(text)
         
         for part in parts:
             if not part:
@@ -905,38 +1165,24 @@ class ChatDisplay(QTextBrowser):
                     self.render_code_with_bold(code_content, cursor)
                 else:
                     # Regular inline code
-                    code_format = QTextCharFormat()
-                    code_format.setFontFamily("Consolas, Monaco, monospace")
-                    code_format.setBackground(QColor("#f6f8fa"))
-                    code_format.setForeground(QColor("#24292e"))
-                    code_format.setFontPointSize(9)
-                    cursor.insertText(code_content, code_format)
+                    cursor.insertText(code_content, self._fmt_inline_code)
                     
             elif part.startswith('**') and part.endswith('**'):
                 # Bold text
-                bold_format = QTextCharFormat()
-                bold_format.setFontWeight(QFont.Bold)
-                bold_format.setForeground(QColor("#000000"))
-                cursor.insertText(part[2:-2], bold_format)
+                cursor.insertText(part[2:-2], self._fmt_bold)
                 
             elif part.startswith('*') and part.endswith('*') and not part.startswith('**'):
                 # Italic text
-                italic_format = QTextCharFormat()
-                italic_format.setFontItalic(True)
-                italic_format.setForeground(QColor("#000000"))
-                cursor.insertText(part[1:-1], italic_format)
+                cursor.insertText(part[1:-1], self._fmt_italic)
                 
             else:
                 # Regular text
-                text_format = QTextCharFormat()
-                text_format.setForeground(QColor("#000000"))
-                cursor.insertText(part, text_format)
+                cursor.insertText(part, self._fmt_text)
     
     def render_code_with_bold(self, code_content: str, cursor: QTextCursor):
         """Render inline code that contains bold markers"""
         # Split by ** to find bold parts within code
-        import re
-        parts = re.split(r'(\*\*[^*]+\*\*)', code_content)
+        parts = _BOLD_RE.split(code_content)
         
         for part in parts:
             if not part:
@@ -944,21 +1190,10 @@ class ChatDisplay(QTextBrowser):
                 
             if part.startswith('**') and part.endswith('**'):
                 # Bold code
-                bold_code_format = QTextCharFormat()
-                bold_code_format.setFontFamily("Consolas, Monaco, monospace")
-                bold_code_format.setBackground(QColor("#f6f8fa"))
-                bold_code_format.setForeground(QColor("#24292e"))
-                bold_code_format.setFontWeight(QFont.Bold)
-                bold_code_format.setFontPointSize(9)
-                cursor.insertText(part[2:-2], bold_code_format)
+                cursor.insertText(part[2:-2], self._fmt_inline_code_bold)
             else:
                 # Regular code
-                code_format = QTextCharFormat()
-                code_format.setFontFamily("Consolas, Monaco, monospace")
-                code_format.setBackground(QColor("#f6f8fa"))
-                code_format.setForeground(QColor("#24292e"))
-                code_format.setFontPointSize(9)
-                cursor.insertText(part, code_format)
+                cursor.insertText(part, self._fmt_inline_code)
 
 
     
@@ -1000,7 +1235,7 @@ class ChatDisplay(QTextBrowser):
             try:
                 index = int(url_str.split(':')[1])
                 
-                if 0 <= index < len(self.code_blocks):
+                if index in self.code_blocks:
                     # Copy code block to clipboard
                     clipboard = QApplication.clipboard()
                     clipboard.setText(self.code_blocks[index])
@@ -1069,7 +1304,7 @@ class ChatDisplay(QTextBrowser):
         """Extract and copy all code blocks to clipboard"""
         if self.code_blocks:
             clipboard = QApplication.clipboard()
-            all_code = '\n\n'.join(self.code_blocks)
+            all_code = '\n\n'.join(self.code_blocks.values())
             clipboard.setText(all_code)
             
             QToolTip.showText(self.mapToGlobal(self.rect().center()), 
@@ -1079,15 +1314,17 @@ class ChatDisplay(QTextBrowser):
     def clear_chat(self):
         """Clear all messages"""
         self.clear()
-        self.messages = []
+        self.messages.clear()
+        self._finalized.clear()
+        self._live_messages.clear()
+        self._archived_messages.clear()
+        self._pending_highlights.clear()
+        self._rendered_cache.clear()
+        self._flush_timer.stop()
+        self._pending_content = None
         self.current_streaming_message = None
-        self.code_blocks = []
-    
-    def escape_html(self, text: str) -> str:
-        """Escape HTML special characters"""
-        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;')
+        self.code_blocks.clear()
     
     def get_all_messages(self):
-        """Get all messages as a list"""
-        return [{'role': msg['role'], 'content': msg['content']} 
-                for msg in self.messages if not msg.get('streaming', False)]
+        """Get all completed messages as a list"""
+        return list(self._finalized)
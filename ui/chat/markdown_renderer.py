@@ -12,6 +12,23 @@ from PySide6.QtGui import (
 import re
 from .renderers import get_renderer
 
+_LIST_ITEM_RE = re.compile(r'^[\s]*(?:[-*+]|\d+\.)\s')
+# Inline elements: bold, italic, code, links
+_INLINE_RE = re.compile(r'(\*\*[^*]+\*\*|\*[^*]+\*|`[^`]+`|\[([^\]]+)\]\(([^)]+)\))')
+_LINK_RE = re.compile(r'\[([^\]]+)\]\(([^)]+)\)')
+
+# Renderers only hold their text formats, so one instance per language is shared
+_RENDERER_CACHE = {}
+
+
+def _cached_renderer(language: str):
+    """Return the shared renderer for a language, creating it on first use"""
+    key = language.lower() if language else ''
+    renderer = _RENDERER_CACHE.get(key)
+    if renderer is None:
+        renderer = _RENDERER_CACHE[key] = get_renderer(key)
+    return renderer
+
 
 class MarkdownRenderer:
     """Enhanced markdown renderer with better code block support"""
@@ -67,6 +84,18 @@ class MarkdownRenderer:
         self.code_text_format.setFontFamily("Consolas, Monaco, 'Courier New', monospace")
         self.code_text_format.setFontPointSize(code_font_size)  # Use config font size
         
+        # Fenced code block label and line formats
+        self.lang_label_format = QTextCharFormat()
+        self.lang_label_format.setFontWeight(QFont.Bold)
+        self.lang_label_format.setForeground(QColor("#6f42c1"))
+        
+        self.code_line_format = QTextBlockFormat()
+        self.code_line_format.setBackground(QColor("#f6f8fa"))
+        self.code_line_format.setLeftMargin(10)  # Reduced margin
+        self.code_line_format.setRightMargin(10)
+        self.code_line_format.setTopMargin(5)
+        self.code_line_format.setBottomMargin(5)
+        
         # List format
         self.list_format = QTextBlockFormat()
         self.list_format.setLeftMargin(20)
@@ -127,11 +156,10 @@ class MarkdownRenderer:
                 continue
             
             # Check for lists
-            if re.match(r'^[\s]*[-*+]\s', line) or re.match(r'^[\s]*\d+\.\s', line):
+            if _LIST_ITEM_RE.match(line):
                 list_lines = [line]
                 i += 1
-                while i < len(lines) and (re.match(r'^[\s]*[-*+]\s', lines[i]) or 
-                                         re.match(r'^[\s]*\d+\.\s', lines[i]) or
+                while i < len(lines) and (_LIST_ITEM_RE.match(lines[i]) or
                                          lines[i].startswith('  ')):
                     list_lines.append(lines[i])
                     i += 1
@@ -186,19 +214,11 @@ class MarkdownRenderer:
         # Insert language label if specified
         if language:
             cursor.insertBlock()
-            lang_format = QTextCharFormat()
-            lang_format.setFontWeight(QFont.Bold)
-            lang_format.setForeground(QColor("#6f42c1"))
-            cursor.insertText(f"[{language}]", lang_format)
+            cursor.insertText(f"[{language}]", self.lang_label_format)
         
         # Apply code block format with monospace font
         cursor.insertBlock()
-        code_block_fmt = QTextBlockFormat()
-        code_block_fmt.setBackground(QColor("#f6f8fa"))
-        code_block_fmt.setLeftMargin(10)  # Reduced margin
-        code_block_fmt.setRightMargin(10)
-        code_block_fmt.setTopMargin(5)
-        code_block_fmt.setBottomMargin(5)
+        code_block_fmt = self.code_line_format
         cursor.setBlockFormat(code_block_fmt)
         
         # Insert code with preserved indentation
@@ -217,7 +237,7 @@ class MarkdownRenderer:
     def insert_code_line(self, cursor: QTextCursor, line: str, language: str):
         """Insert a line of code using language-specific renderer"""
         # Get appropriate renderer for the language
-        renderer = get_renderer(language)
+        renderer = _cached_renderer(language)
         
         # Use the renderer to render the line
         renderer.render_line(cursor, line)
@@ -257,10 +277,7 @@ class MarkdownRenderer:
     
     def render_inline_formatting(self, cursor: QTextCursor, text: str):
         """Apply inline formatting (bold, italic, code, links)"""
-        # Pattern for inline elements
-        pattern = r'(\*\*[^*]+\*\*|\*[^*]+\*|`[^`]+`|\[([^\]]+)\]\(([^)]+)\))'
-        
-        parts = re.split(pattern, text)
+        parts = _INLINE_RE.split(text)
         
         for part in parts:
             if not part:
@@ -277,7 +294,7 @@ class MarkdownRenderer:
                 cursor.insertText(part[1:-1], self.inline_code_format)
             elif part.startswith('['):
                 # Link - extract text and URL
-                match = re.match(r'\[([^\]]+)\]\(([^)]+)\)', part)
+                match = _LINK_RE.match(part)
                 if match:
                     link_text = match.group(1)
                     cursor.insertText(link_text, self.link_format)
@@ -5,6 +5,8 @@ Base code renderer class
 from PySide6.QtGui import QTextCharFormat, QColor, QFont, QTextCursor
 import re
 
+_HTML_ESCAPE = str.maketrans({'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'})
+
 
 class BaseCodeRenderer:
     """Base class for language-specific code renderers"""
@@ -286,4 +288,4 @@ class BaseCodeRenderer:
     
     def escape_html(self, text: str) -> str:
         """Escape HTML special characters"""
-        return text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;').replace("'", '&#39;')
+        return text.translate(_HTML_ESCAPE)